@@ -3,13 +3,17 @@
 专为中国A股散户设计的股票分析工具
 """
 
+from dataclasses import dataclass
+from types import MappingProxyType
+
 # 项目信息
 PROJECT_NAME = "A股散户分析系统"
 VERSION = "1.0.0"
 DESCRIPTION = "专为中国A股散户设计的简单实用的股票分析工具"
 
 # 数据源配置
-DATA_SOURCES = {
+# 注意：模块加载后即视为只读，修改配置请编辑本文件后重启
+DATA_SOURCES = MappingProxyType({
     "akshare": {
         "enabled": False,  # 已禁用
         "priority": 3,  # 优先级：数字越小优先级越高
@@ -47,7 +51,27 @@ DATA_SOURCES = {
         "description": "网易财经 - 股票行情数据",
         "features": ["历史数据", "实时数据"]
     }
-}
+})
+
+# 预排序的数据源快照（按优先级升序）
+# 热路径直接迭代元组即可，无需每次调用 items() 再排序
+SOURCES_BY_PRIORITY = tuple(
+    sorted(DATA_SOURCES.items(), key=lambda x: x[1].get("priority", 99))
+)
+ENABLED_SOURCES_BY_PRIORITY = tuple(
+    (name, source_config) for name, source_config in SOURCES_BY_PRIORITY
+    if source_config.get("enabled", True)
+)
+
+# SoA（并行元组）形式的配置视图：按优先级对齐的名称/启用/优先级数组，
+# 热路径按下标访问即可，无需逐项做字典哈希查找
+SOURCE_NAMES = tuple(name for name, _ in SOURCES_BY_PRIORITY)
+SOURCE_ENABLED = tuple(
+    source_config.get("enabled", True) for _, source_config in SOURCES_BY_PRIORITY
+)
+SOURCE_PRIORITY = tuple(
+    source_config.get("priority", 99) for _, source_config in SOURCES_BY_PRIORITY
+)
 
 # 数据库配置
 DATABASE = {
@@ -56,13 +80,43 @@ DATABASE = {
 }
 
 # 技术指标配置
-TECHNICAL_INDICATORS = {
-    "MA": [5, 10, 20, 60],  # 移动平均线周期
-    "MACD": {"fast": 12, "slow": 26, "signal": 9},
-    "RSI": {"period": 14},
-    "KDJ": {"k_period": 9, "d_period": 3, "j_period": 3},
-    "BOLL": {"period": 20, "std": 2}  # 布林带
-}
+# 冻结的slots dataclass：热路径上属性访问走slot偏移，比嵌套字典的两次
+# 哈希查找更快，且参数不可被意外修改
+@dataclass(frozen=True, slots=True)
+class MACDConfig:
+    fast: int = 12
+    slow: int = 26
+    signal: int = 9
+
+
+@dataclass(frozen=True, slots=True)
+class RSIConfig:
+    period: int = 14
+
+
+@dataclass(frozen=True, slots=True)
+class KDJConfig:
+    k_period: int = 9
+    d_period: int = 3
+    j_period: int = 3
+
+
+@dataclass(frozen=True, slots=True)
+class BOLLConfig:
+    period: int = 20
+    std: float = 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class TechnicalIndicatorConfig:
+    ma: tuple = (5, 10, 20, 60)  # 移动平均线周期
+    macd: MACDConfig = MACDConfig()
+    rsi: RSIConfig = RSIConfig()
+    kdj: KDJConfig = KDJConfig()
+    boll: BOLLConfig = BOLLConfig()  # 布林带
+
+
+TECHNICAL_INDICATORS = TechnicalIndicatorConfig()
 
 # 风险评估配置
 RISK_ASSESSMENT = {
@@ -100,24 +154,27 @@ RETAIL_STRATEGY = {
 }
 
 # 海龜交易法则配置
-TURTLE_STRATEGY = {
+@dataclass(frozen=True, slots=True)
+class TurtleStrategyConfig:
     # 系统1参数（短期）
-    "system1_entry_period": 20,    # 20天突破入场
-    "system1_exit_period": 10,     # 10天突破出场
-    
+    system1_entry_period: int = 20    # 20天突破入场
+    system1_exit_period: int = 10     # 10天突破出场
+
     # 系统2参数（长期）
-    "system2_entry_period": 55,    # 55天突破入场
-    "system2_exit_period": 20,     # 20天突破出场
-    
+    system2_entry_period: int = 55    # 55天突破入场
+    system2_exit_period: int = 20     # 20天突破出场
+
     # 风险管理参数
-    "atr_period": 20,              # ATR计算周期
-    "stop_loss_atr_multiple": 2.0, # 止损为2倍ATR
-    "position_risk_pct": 0.02,     # 每笔交易风险2%
-    "max_positions": 4,            # 最大同时持仓数
-    
+    atr_period: int = 20              # ATR计算周期
+    stop_loss_atr_multiple: float = 2.0  # 止损为2倍ATR
+    position_risk_pct: float = 0.02   # 每笔交易风险2%
+    max_positions: int = 4            # 最大同时持仓数
+
     # 资金管理
-    "total_capital": 100000,       # 总资金
-    "unit_limit_single": 0.05,     # 单个市场最大仓位5%
-    "unit_limit_sector": 0.12,     # 同行业最大仓位12%
-    "unit_limit_direction": 0.20,  # 同方向最大仓位20%
-}
\ No newline at end of file
+    total_capital: int = 100000       # 总资金
+    unit_limit_single: float = 0.05   # 单个市场最大仓位5%
+    unit_limit_sector: float = 0.12   # 同行业最大仓位12%
+    unit_limit_direction: float = 0.20  # 同方向最大仓位20%
+
+
+TURTLE_STRATEGY = TurtleStrategyConfig()
\ No newline at end of file
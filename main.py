@@ -5,48 +5,97 @@ A股散户分析系统 - 主程序入口
 
 import os
 import sys
-import argparse
 import logging
 from datetime import datetime
-from dotenv import load_dotenv
 
-# 加载环境变量
-load_dotenv()
+from config import PROJECT_NAME, VERSION
 
-# 添加项目根目录到Python路径
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# 说明：数据源/数据库/分析引擎模块会拉起pandas等重依赖，
+# 统一在各命令处理函数内部按需导入，保证 help 等轻量命令秒开
+
+
+def load_environment():
+    """加载环境变量（只有需要访问数据源的命令才调用）"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def setup_console_logging():
+    """设置控制台日志（所有命令都需要）"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
 
-from src.data_source.factory import get_data_source_manager
-from src.database.manager import DatabaseManager
-from src.analysis.engine import AnalysisEngine
-from config import PROJECT_NAME, VERSION
 
+def attach_file_logging():
+    """附加文件日志
+
+    只有真正执行分析/联网的命令才创建 logs/ 目录和日志文件，
+    help 等轻量命令不用付出 mkdir+open 的开销。
+
+    文件侧用 RotatingFileHandler(delay=True) 惰性打开并限制单文件大小，
+    外面套 MemoryHandler 批量落盘：普通INFO日志攒满一批才写一次文件，
+    遇到ERROR立即刷出，进程退出时由logging.shutdown统一flush。
+    """
+    from logging.handlers import RotatingFileHandler, MemoryHandler
 
-def setup_logging():
-    """设置日志"""
     log_dir = "logs"
     os.makedirs(log_dir, exist_ok=True)
-    
+
     log_file = os.path.join(log_dir, f"stock_analysis_{datetime.now().strftime('%Y%m%d')}.log")
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
+
+    file_handler = RotatingFileHandler(
+        log_file, maxBytes=10_000_000, backupCount=5,
+        encoding='utf-8', delay=True
     )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    buffered_handler = MemoryHandler(
+        capacity=512, flushLevel=logging.ERROR, target=file_handler
+    )
+    logging.getLogger().addHandler(buffered_handler)
+
+
+# 进程内缓存的连通性结果，analyze/web共用一次探测
+_connection_ok = None
+
+
+def ensure_connection() -> bool:
+    """确认数据源连通（轻量探测 + 进程内缓存）
+
+    与test_data_connection不同，这里只ping主数据源而不拉取整个
+    股票列表，结果在进程生命周期内缓存。
+    """
+    global _connection_ok
+
+    if _connection_ok is None:
+        from src.data_source.factory import get_data_source_manager
+
+        print("正在检查数据源连接...")
+        _connection_ok = get_data_source_manager().ping()
+
+        if _connection_ok:
+            print("✅ 数据源连接正常")
+
+    return _connection_ok
 
 
 def test_data_connection():
     """测试数据连接"""
+    from src.data_source.factory import get_data_source_manager, get_available_sources
+
     print("正在测试数据源连接...")
-    
-    # 获取数据源管理器
+
+    # 获取数据源管理器和可用数据源快照（缓存，避免重复探测）
     data_manager = get_data_source_manager()
-    
-    if not data_manager.get_available_sources():
+    available_sources = get_available_sources()
+
+    if not available_sources:
         print("❌ 没有可用的数据源！")
         print("请检查以下配置：")
         print("1. 网络连接是否正常")
@@ -54,8 +103,8 @@ def test_data_connection():
         print("3. 请访问 https://tushare.pro 注册并获取token")
         print("4. 在 .env 文件中设置: TUSHARE_TOKEN=your_token_here")
         return False
-    
-    print(f"✅ 可用数据源: {', '.join(data_manager.get_available_sources())}")
+
+    print(f"✅ 可用数据源: {', '.join(available_sources)}")
     
     # 测试获取股票列表
     try:
@@ -76,8 +125,11 @@ def test_data_connection():
 
 def analyze_single_stock(symbol: str):
     """分析单只股票"""
+    from src.database.manager import DatabaseManager
+    from src.analysis.engine import AnalysisEngine
+
     print(f"\n正在分析股票 {symbol}...")
-    
+
     # 初始化组件
     db_manager = DatabaseManager()
     analysis_engine = AnalysisEngine(db_manager)
@@ -86,54 +138,104 @@ def analyze_single_stock(symbol: str):
     result = analysis_engine.analyze_stock(symbol, days=120)
     
     if result['status'] == 'success':
-        print(f"✅ 股票 {symbol} 分析完成")
-        
+        # 预先格式化所有输出行，最后writelines一次性写出，
+        # 避免几十次print逐行加锁刷盘
+        lines = [f"✅ 股票 {symbol} 分析完成\n"]
+
         # 显示分析结果
         if result['summary']:
             summary = result['summary']
             basic_info = summary.get('basic_info', {})
-            
-            print(f"\n📊 基本信息:")
-            print(f"   最新价格: {basic_info.get('latest_price', 'N/A')} 元")
-            print(f"   涨跌幅: {basic_info.get('price_change_pct', 'N/A')}%")
-            print(f"   成交量: {basic_info.get('volume', 'N/A')}")
-            
-            print(f"\n🔍 技术状态:")
+
+            lines.append("\n📊 基本信息:\n")
+            lines.append(f"   最新价格: {basic_info.get('latest_price', 'N/A')} 元\n")
+            lines.append(f"   涨跌幅: {basic_info.get('price_change_pct', 'N/A')}%\n")
+            lines.append(f"   成交量: {basic_info.get('volume', 'N/A')}\n")
+
+            lines.append("\n🔍 技术状态:\n")
             tech_status = summary.get('technical_status', {})
-            for key, value in tech_status.items():
-                print(f"   {key}: {value}")
-            
-            print(f"\n📈 投资建议: {summary.get('recommendation', 'N/A')}")
-            print(f"   风险等级: {summary.get('risk_level', 'N/A')}")
-            
+            lines.extend(f"   {key}: {value}\n" for key, value in tech_status.items())
+
+            lines.append(f"\n📈 投资建议: {summary.get('recommendation', 'N/A')}\n")
+            lines.append(f"   风险等级: {summary.get('risk_level', 'N/A')}\n")
+
             if result['signals']:
-                print(f"\n⚡ 技术信号:")
-                for signal in result['signals']:
-                    print(f"   - {signal}")
-        
+                lines.append("\n⚡ 技术信号:\n")
+                lines.extend(f"   - {signal}\n" for signal in result['signals'])
+
         # 显示图表文件路径
         if result['charts']:
-            print(f"\n📈 图表文件:")
-            for chart_type, path in result['charts'].items():
-                if os.path.exists(path):
-                    print(f"   {chart_type}: {path}")
-    
+            lines.append("\n📈 图表文件:\n")
+            lines.extend(f"   {chart_type}: {path}\n"
+                         for chart_type, path in result['charts'].items()
+                         if path and os.path.exists(path))
+
+        sys.stdout.writelines(lines)
+        sys.stdout.flush()
+
     else:
         print(f"❌ 股票 {symbol} 分析失败: {result.get('message', '未知错误')}")
 
 
-def start_web_server():
-    """启动Web服务器"""
+def analyze_one(symbol: str) -> dict:
+    """分析单只股票并返回结果字典
+
+    进程池的工作函数，必须位于模块顶层才能被pickle；
+    每个子进程惰性初始化自己的引擎，并复用磁盘缓存。
+    """
+    from src.database.manager import DatabaseManager
+    from src.analysis.engine import AnalysisEngine
+
+    engine = AnalysisEngine(DatabaseManager())
+    return engine.analyze_stock(symbol, days=120)
+
+
+def analyze_many(symbols):
+    """用进程池并行分析多只股票
+
+    指标计算是CPU密集的numpy运算，进程池绕开GIL后整体吞吐
+    随核数线性扩展；chunksize用于摊薄进程间通信开销。
+    :param symbols: 股票代码列表
+    :return: 按输入顺序产出各股票的分析结果
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        yield from pool.map(analyze_one, symbols, chunksize=16)
+
+
+def start_web_server(prod: bool = False):
+    """启动Web服务器
+
+    :param prod: 生产模式下用gunicorn多进程启动；默认用Flask开发服务器
+    """
     try:
         from src.web.app import create_app
-        
-        app = create_app()
+
         print(f"\n🚀 启动Web界面...")
         print(f"📱 访问地址: http://localhost:8080")
         print(f"按 Ctrl+C 停止服务器\n")
-        
-        app.run(host='0.0.0.0', port=8080, debug=True, threaded=True)
-        
+
+        if prod:
+            import shutil
+            if shutil.which('gunicorn'):
+                workers = os.cpu_count() or 2
+                # execvp直接替换当前进程，gunicorn按核数起worker并开启keep-alive
+                os.execvp('gunicorn', [
+                    'gunicorn',
+                    '--workers', str(workers),
+                    '--keep-alive', '30',
+                    '--bind', '0.0.0.0:8080',
+                    'src.web.app:create_app()'
+                ])
+            else:
+                print("⚠️ 未安装gunicorn，回退到内置服务器（生产环境建议 pip install gunicorn）")
+                app = create_app()
+                app.run(host='0.0.0.0', port=8080, debug=False, threaded=True)
+        else:
+            app = create_app()
+            app.run(host='0.0.0.0', port=8080, debug=True, threaded=True)
+
     except ImportError as e:
         print(f"❌ Web模块未完成: {e}")
         print("请先实现Web界面模块")
@@ -158,6 +260,7 @@ def show_help():
 示例:
     python main.py test                 # 测试数据连接
     python main.py analyze 000001       # 分析平安银行
+    python main.py analyze 000001,600519  # 并行分析多只股票
     python main.py web                  # 启动Web界面
 
 注意:
@@ -174,21 +277,30 @@ def show_help():
 def main():
     """主函数"""
     # 设置日志
-    setup_logging()
-    
-    # 解析命令行参数
-    parser = argparse.ArgumentParser(description=f'{PROJECT_NAME} v{VERSION}')
-    parser.add_argument('command', nargs='?', default='help', 
-                       help='命令: test/analyze/web/help')
-    parser.add_argument('symbol', nargs='?', 
-                       help='股票代码（用于analyze命令）')
-    
-    args = parser.parse_args()
-    
+    setup_console_logging()
+
+    # 手写参数解析：命令行形式足够简单（命令+可选股票代码+--prod），
+    # 省掉argparse及其textwrap/gettext依赖的冷启动导入开销
+    argv = sys.argv[1:]
+    prod = '--prod' in argv
+    if prod:
+        argv = [a for a in argv if a != '--prod']
+
+    command = argv[0] if argv else 'help'
+    symbol = argv[1] if len(argv) > 1 else None
+
+    if command in ('-h', '--help'):
+        command = 'help'
+
     print(f"🏛️  {PROJECT_NAME} v{VERSION}")
     print("=" * 50)
-    
-    if args.command == 'test':
+
+    # 只有需要访问数据源的命令才加载环境变量和文件日志
+    if command in ('test', 'analyze', 'web'):
+        load_environment()
+        attach_file_logging()
+
+    if command == 'test':
         success = test_data_connection()
         if success:
             print("\n✅ 系统检查通过，可以开始使用")
@@ -196,32 +308,49 @@ def main():
             print("\n❌ 系统检查失败，请检查配置")
             sys.exit(1)
     
-    elif args.command == 'analyze':
-        if not args.symbol:
+    elif command == 'analyze':
+        if not symbol:
             print("❌ 请提供股票代码")
             print("示例: python main.py analyze 000001")
             sys.exit(1)
         
-        # 先测试连接
-        if not test_data_connection():
+        # 先做轻量连通性检查（不拉取股票列表）
+        if not ensure_connection():
             print("❌ 数据连接失败，无法进行分析")
             sys.exit(1)
-        
-        analyze_single_stock(args.symbol)
+
+        symbols = [s for s in symbol.split(',') if s]
+        if not symbols:
+            # 形如"analyze ,"的输入会过滤出空列表
+            print("❌ 请提供股票代码")
+            print("示例: python main.py analyze 000001")
+            sys.exit(1)
+
+        if len(symbols) > 1:
+            print(f"\n正在并行分析 {len(symbols)} 只股票...")
+            for result in analyze_many(symbols):
+                if result['status'] == 'success':
+                    summary = result.get('summary') or {}
+                    print(f"✅ {result['symbol']}: {summary.get('recommendation', 'N/A')}"
+                          f"（风险等级: {summary.get('risk_level', 'N/A')}）")
+                else:
+                    print(f"❌ {result['symbol']}: {result.get('message', '未知错误')}")
+        else:
+            analyze_single_stock(symbols[0])
     
-    elif args.command == 'web':
-        # 先测试连接
-        if not test_data_connection():
+    elif command == 'web':
+        # 先做轻量连通性检查（不拉取股票列表）
+        if not ensure_connection():
             print("❌ 数据连接失败，无法启动Web服务")
             sys.exit(1)
-        
-        start_web_server()
+
+        start_web_server(prod=prod)
     
-    elif args.command == 'help':
+    elif command == 'help':
         show_help()
     
     else:
-        print(f"❌ 未知命令: {args.command}")
+        print(f"❌ 未知命令: {command}")
         show_help()
         sys.exit(1)
 
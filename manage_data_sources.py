@@ -5,9 +5,11 @@
 
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from src.data_source.factory import get_data_source_manager, DataSourceFactory, reset_data_source_manager
+import ast
+import importlib
+import io
 import json
 import logging
 
@@ -21,49 +23,55 @@ class DataSourceManager:
     def __init__(self):
         self.config_file = "config.py"
         self.source_info = DataSourceFactory.get_source_info()
+        # 预排序的配置快照，避免每次 show_status 重新排序
+        from config import SOURCES_BY_PRIORITY
+        self._sorted_sources = SOURCES_BY_PRIORITY
+        # 配置文件源码缓存，同一次CLI调用内多次更新只读一次磁盘
+        self._config_source = None
     
     def show_status(self):
         """显示当前数据源状态"""
-        print("=" * 70)
-        print("📊 数据源状态管理")
-        print("=" * 70)
-        
+        # 输出先写入内存缓冲，最后一次性写stdout，避免几十次print逐行刷盘
+        buf = io.StringIO()
+        buf.write("=" * 70 + "\n")
+        buf.write("📊 数据源状态管理\n")
+        buf.write("=" * 70 + "\n")
+
         try:
-            # 导入当前配置
-            sys.path.insert(0, os.path.dirname(__file__))
-            from config import DATA_SOURCES
-            
-            print("\n🔧 当前配置：")
-            print("-" * 50)
-            
-            for source_name, config in DATA_SOURCES.items():
+            buf.write("\n🔧 当前配置：\n")
+            buf.write("-" * 50 + "\n")
+
+            for source_name, config in self._sorted_sources:
                 info = self.source_info.get(source_name, {})
                 status = "✅ 启用" if config.get('enabled', True) else "❌ 禁用"
                 priority = config.get('priority', 99)
-                
-                print(f"{info.get('name', source_name)} ({source_name})")
-                print(f"  状态：{status}")
-                print(f"  优先级：{priority}")
-                print(f"  描述：{config.get('description', 'N/A')}")
+
+                buf.write(f"{info.get('name', source_name)} ({source_name})\n")
+                buf.write(f"  状态：{status}\n")
+                buf.write(f"  优先级：{priority}\n")
+                buf.write(f"  描述：{config.get('description', 'N/A')}\n")
                 if 'features' in config:
-                    print(f"  功能：{', '.join(config['features'])}")
-                print()
-            
+                    buf.write(f"  功能：{', '.join(config['features'])}\n")
+                buf.write("\n")
+
             # 测试连接状态
-            print("🔗 连接测试：")
-            print("-" * 50)
-            
+            buf.write("🔗 连接测试：\n")
+            buf.write("-" * 50 + "\n")
+
             manager = get_data_source_manager()
             connection_results = manager.connect_all()
-            
+
             for source_name, connected in connection_results.items():
                 status = "🟢 在线" if connected else "🔴 离线"
-                print(f"  {source_name}: {status}")
-            
-            print(f"\n🎯 当前主数据源：{manager.primary_source}")
-            
+                buf.write(f"  {source_name}: {status}\n")
+
+            buf.write(f"\n🎯 当前主数据源：{manager.primary_source}\n")
+
         except Exception as e:
-            print(f"❌ 获取状态失败：{e}")
+            buf.write(f"❌ 获取状态失败：{e}\n")
+
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
     
     def enable_source(self, source_name: str):
         """启用数据源"""
@@ -118,14 +126,16 @@ class DataSourceManager:
             return False
         
         try:
-            # 先测试连接
-            reset_data_source_manager()
+            # 先用缓存的快照做O(1)成员判断，只有不在快照中才重置重新探测
+            from src.data_source.factory import get_available_source_set
+
+            if source_name not in get_available_source_set():
+                reset_data_source_manager()
+                if source_name not in get_available_source_set():
+                    print(f"❌ 数据源 {source_name} 不可用或连接失败")
+                    return False
+
             manager = get_data_source_manager()
-            
-            if source_name not in manager.get_available_sources():
-                print(f"❌ 数据源 {source_name} 不可用或连接失败")
-                return False
-            
             manager.set_primary_source(source_name)
             print(f"✅ 已设置主数据源为：{source_name}")
             return True
@@ -134,58 +144,130 @@ class DataSourceManager:
             return False
     
     def _update_source_config(self, source_name: str, updates: dict):
-        """更新数据源配置"""
-        # 读取当前配置文件
-        with open(self.config_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 这里简化处理，实际项目中可能需要更复杂的配置更新逻辑
-        # 由于配置文件格式复杂，这里只提示用户手动修改
-        print(f"⚠️ 请手动更新配置文件 {self.config_file} 中 {source_name} 的配置：")
-        for key, value in updates.items():
-            print(f"   {key}: {value}")
+        """更新数据源配置
+
+        通过AST定位 DATA_SOURCES 中对应的值节点，做精确的文本替换后
+        原子写回（临时文件 + os.replace），保留原有注释和格式。
+        """
+        content = self._load_config_source()
+
+        # 定位DATA_SOURCES中目标数据源的配置字典
+        source_dict = self._find_source_dict(content, source_name)
+        if source_dict is None:
+            raise ValueError(f"配置文件中未找到数据源 {source_name} 的配置")
+
+        # 收集需要替换的值节点，按位置倒序替换以保持偏移有效
+        replacements = []
+        for key_node, value_node in zip(source_dict.keys, source_dict.values):
+            if isinstance(key_node, ast.Constant) and key_node.value in updates:
+                replacements.append((value_node, updates[key_node.value]))
+
+        found_keys = {key_node.value for key_node in source_dict.keys
+                      if isinstance(key_node, ast.Constant)}
+        missing = set(updates) - found_keys
+        if missing:
+            raise ValueError(f"数据源 {source_name} 配置中缺少字段: {', '.join(missing)}")
+
+        line_offsets = self._build_line_offsets(content)
+        new_content = content
+        replacements.sort(
+            key=lambda item: line_offsets[item[0].lineno - 1] + item[0].col_offset,
+            reverse=True
+        )
+        for value_node, new_value in replacements:
+            start = line_offsets[value_node.lineno - 1] + value_node.col_offset
+            end = line_offsets[value_node.end_lineno - 1] + value_node.end_col_offset
+            new_content = new_content[:start] + repr(new_value) + new_content[end:]
+
+        # 原子写回，避免中途失败留下半成品配置
+        tmp_file = self.config_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+        os.replace(tmp_file, self.config_file)
+
+        # 更新缓存并重新加载配置，后续操作立即可见
+        self._config_source = new_content
+        import config
+        importlib.reload(config)
+        self._sorted_sources = config.SOURCES_BY_PRIORITY
+        reset_data_source_manager()
+
+    def _load_config_source(self) -> str:
+        """读取配置文件源码（带缓存）"""
+        if self._config_source is None:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                self._config_source = f.read()
+        return self._config_source
+
+    def _find_source_dict(self, content: str, source_name: str):
+        """在配置源码中定位指定数据源的配置Dict节点"""
+        tree = ast.parse(content)
+        for node in tree.body:
+            if not isinstance(node, ast.Assign):
+                continue
+            if not any(isinstance(t, ast.Name) and t.id == 'DATA_SOURCES'
+                       for t in node.targets):
+                continue
+            value = node.value
+            # 兼容 MappingProxyType({...}) 包装
+            if isinstance(value, ast.Call) and value.args:
+                value = value.args[0]
+            if not isinstance(value, ast.Dict):
+                return None
+            for key_node, value_node in zip(value.keys, value.values):
+                if (isinstance(key_node, ast.Constant) and
+                        key_node.value == source_name and
+                        isinstance(value_node, ast.Dict)):
+                    return value_node
+        return None
+
+    @staticmethod
+    def _build_line_offsets(content: str) -> list:
+        """计算每行行首在源码中的绝对偏移"""
+        offsets = [0]
+        for line in content.splitlines(keepends=True):
+            offsets.append(offsets[-1] + len(line))
+        return offsets
     
     def recommend_sources(self):
         """推荐数据源配置"""
-        print("💡 数据源使用建议：")
-        print("-" * 50)
-        
-        print("🔥 推荐配置（优先级从高到低）：")
-        print("  1. 东方财富 (eastmoney) - 免费、稳定、数据全面")
-        print("     • 优势：完全免费，数据及时，接口稳定")
-        print("     • 劣势：无")
-        print()
-        
-        print("  2. Tushare (tushare) - 专业数据接口")
-        print("     • 优势：数据质量高，功能专业")
-        print("     • 劣势：免费用户有API限制，需要token")
-        print()
-        
-        print("  3. AKShare (akshare) - 开源数据接口")
-        print("     • 优势：完全开源免费，功能丰富")
-        print("     • 劣势：依赖第三方接口，稳定性一般")
-        print()
-        
-        print("  4. 新浪财经 (sina) - 实时数据补充")
-        print("     • 优势：实时性好")
-        print("     • 劣势：只有实时数据，无历史数据")
-        print()
-        
-        print("  5. 腾讯股票 (qqstock) - 备用选择")
-        print("     • 优势：有K线数据")
-        print("     • 劣势：接口不太稳定")
-        print()
-        
-        print("  6. 网易财经 (wangyi) - 备用选择")
-        print("     • 优势：数据格式简单")
-        print("     • 劣势：功能有限")
-        print()
-        
-        print("\n🎯 最佳实践：")
-        print("  • 启用多个数据源作为备份")
-        print("  • 东方财富设为最高优先级")
-        print("  • 如有Tushare token，可设为第二优先级")
-        print("  • 实时数据可使用新浪财经作为补充")
+        # 全静态文案，单次写stdout即可
+        text = f"""💡 数据源使用建议：
+{'-' * 50}
+🔥 推荐配置（优先级从高到低）：
+  1. 东方财富 (eastmoney) - 免费、稳定、数据全面
+     • 优势：完全免费，数据及时，接口稳定
+     • 劣势：无
+
+  2. Tushare (tushare) - 专业数据接口
+     • 优势：数据质量高，功能专业
+     • 劣势：免费用户有API限制，需要token
+
+  3. AKShare (akshare) - 开源数据接口
+     • 优势：完全开源免费，功能丰富
+     • 劣势：依赖第三方接口，稳定性一般
+
+  4. 新浪财经 (sina) - 实时数据补充
+     • 优势：实时性好
+     • 劣势：只有实时数据，无历史数据
+
+  5. 腾讯股票 (qqstock) - 备用选择
+     • 优势：有K线数据
+     • 劣势：接口不太稳定
+
+  6. 网易财经 (wangyi) - 备用选择
+     • 优势：数据格式简单
+     • 劣势：功能有限
+
+
+🎯 最佳实践：
+  • 启用多个数据源作为备份
+  • 东方财富设为最高优先级
+  • 如有Tushare token，可设为第二优先级
+  • 实时数据可使用新浪财经作为补充
+"""
+        sys.stdout.write(text)
+        sys.stdout.flush()
 
 
 def main():
@@ -7,6 +7,9 @@ import matplotlib
 # 设置为非GUI后端，避免macOS线程问题
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
@@ -14,10 +17,158 @@ import matplotlib.dates as mdates
 from datetime import datetime
 import os
 import logging
+import threading
+import hashlib
+import json
+import io
+from concurrent.futures import ThreadPoolExecutor
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']  # 用来正常显示中文标签
-plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
+from PIL import Image
+
+# numba为可选加速依赖：存在时用JIT版LTTB降采样，缺失时退回纯numpy实现
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# 全局绘图配置只在模块导入时做一次：plt.style.use会遍历样式库并
+# 整体重建rcParams，放在__init__里每个实例都要付一遍代价
+_CONFIGURED = False
+
+
+def _configure_once():
+    global _CONFIGURED
+    if _CONFIGURED:
+        return
+
+    plt.style.use('default')
+    matplotlib.rcParams.update({
+        # 中文字体与负号显示
+        'font.sans-serif': ['Arial Unicode MS', 'SimHei', 'DejaVu Sans'],
+        'axes.unicode_minus': False,
+        # 长曲线渲染：开启路径简化并放大分块，降低Agg光栅化成本
+        'path.simplify': True,
+        'path.simplify_threshold': 1.0,
+        'agg.path.chunksize': 10000,
+    })
+    _CONFIGURED = True
+
+    # 预热文本渲染缓存：图例/轴标签字符串在所有图表间完全相同，
+    # matplotlib的字形缓存按(字体,字号,文本)命中，先画一遍后
+    # 后续所有图表的这些文本都走缓存
+    _LEGEND_STRINGS = ('收盘价', 'MA5', 'MA10', 'MA20', 'MA60',
+                       '布林上轨', '布林中轨', '布林下轨', '布林带',
+                       'MACD', '信号线', 'MACD柱', 'RSI',
+                       'K线', 'D线', 'J线', '成交量',
+                       '价格 (元)', 'KDJ值', 'MACD值', 'RSI值')
+    try:
+        fig = Figure(figsize=(2, 2))
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        for text in _LEGEND_STRINGS:
+            ax.text(0.5, 0.5, text)
+        canvas.draw()
+    except Exception:
+        # 预热失败不影响功能，只是少了首图加速
+        pass
+
+
+_configure_once()
+
+
+def _downsample_indices(values: np.ndarray, n_out: int) -> Optional[np.ndarray]:
+    """计算MinMax降采样索引（纯numpy实现）
+
+    把序列均分成n_out/2个桶，每桶保留最小值和最大值两个点，
+    与MinMaxLTTB一样保住视觉极值；超出像素分辨率的点对Agg
+    渲染没有视觉增益，只会拖慢光栅化。
+    :param values: 待降采样的序列
+    :param n_out: 目标点数（约为图宽像素数的2倍）
+    :return: 升序索引数组；序列足够短时返回None表示无需降采样
+    """
+    n = values.size
+    if n <= n_out or n_out < 4:
+        return None
+
+    n_bins = n_out // 2
+    bin_size = -(-n // n_bins)  # 向上取整
+    pad = bin_size * n_bins - n
+
+    # NaN用±inf填充，保证argmin/argmax不选中缺失点
+    nan_mask = np.isnan(values)
+    lo = np.where(nan_mask, np.inf, values)
+    hi = np.where(nan_mask, -np.inf, values)
+    if pad:
+        lo = np.concatenate([lo, np.full(pad, np.inf)])
+        hi = np.concatenate([hi, np.full(pad, -np.inf)])
+
+    base = np.arange(n_bins, dtype=np.int64) * bin_size
+    idx = np.concatenate([
+        base + lo.reshape(n_bins, bin_size).argmin(axis=1),
+        base + hi.reshape(n_bins, bin_size).argmax(axis=1),
+        [0, n - 1],
+    ])
+    idx = np.unique(idx)
+    return idx[idx < n]
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def _lttb_indices_jit(x, y, n_out):  # pragma: no cover - 需numba环境
+        """LTTB降采样索引（numba编译）
+
+        经典最大三角形面积选点：每桶挑一个与上一保留点、下一桶均值点
+        构成面积最大的点，比MinMax更忠实地保留曲线形态；纯Python实现
+        的逐桶循环开销大，JIT后是C速度的标量循环。
+        """
+        n = x.shape[0]
+        out = np.empty(n_out, dtype=np.int64)
+        out[0] = 0
+        out[n_out - 1] = n - 1
+        every = (n - 2) / (n_out - 2)
+
+        a = 0
+        for i in range(n_out - 2):
+            start = int(i * every) + 1
+            end = int((i + 1) * every) + 1
+
+            # 下一桶的平均点作为三角形第三个顶点
+            next_start = end
+            next_end = int((i + 2) * every) + 1
+            if next_end > n:
+                next_end = n
+            cnt = next_end - next_start
+            if cnt < 1:
+                next_start = n - 1
+                next_end = n
+                cnt = 1
+
+            avg_x = 0.0
+            avg_y = 0.0
+            for j in range(next_start, next_end):
+                avg_x += x[j]
+                avg_y += y[j]
+            avg_x /= cnt
+            avg_y /= cnt
+
+            ax_ = x[a]
+            ay = y[a]
+            max_area = -1.0
+            chosen = start
+            for j in range(start, end):
+                yj = y[j]
+                if yj != yj:  # NaN不参与选点
+                    continue
+                area = abs((ax_ - avg_x) * (yj - ay) - (ax_ - x[j]) * (avg_y - ay))
+                if area > max_area:
+                    max_area = area
+                    chosen = j
+
+            out[i + 1] = chosen
+            a = chosen
+        return out
+else:
+    _lttb_indices_jit = None
 
 
 class ChartGenerator:
@@ -34,14 +185,219 @@ class ChartGenerator:
             self.logger.error(f"创建图表目录失败: {e}")
             self.output_dir = "."
         
-        # 设置图表默认参数
-        plt.style.use('default')
-        
-        # 设置中文字体（如果支持）
+        # 输出分辨率：150dpi对屏幕查看已经足够，相比300dpi像素数
+        # 降为1/4，Agg光栅化和PNG压缩开销同步下降
+        self.dpi = 150
+
+        # Figure池（线程本地）：按布局缓存Figure+Agg画布，批量出图时
+        # 复用渲染器，避免每张图都重新构造Figure、分配Agg缓冲。
+        # 每个渲染线程只复用自己创建的Figure，杜绝两个线程拿到同一个
+        # Figure互相cla()对方正在绘制的内容
+        self._fig_local = threading.local()
+
+        # 图表结果缓存：按(symbol, 图表类型, 数据指纹)记住已生成的PNG，
+        # 数据没变就直接复用文件，跳过整个渲染管线；
+        # manifest落盘后重启进程/跨进程也能命中
+        self._manifest_path = os.path.join(self.output_dir, '.chart_manifest.json')
+        self._chart_cache = self._load_manifest()
+        # 渲染跑在线程池里，manifest的插入和落盘需要互斥，
+        # 否则dump迭代字典时被并发插入会直接抛RuntimeError
+        self._manifest_lock = threading.Lock()
+
+    def _get_figure(self, nrows: int, figsize: Tuple[float, float],
+                    height_ratios: Tuple[int, ...] = None):
+        """获取复用的Figure和Axes列表
+
+        缓存未命中时新建Figure并绑定Agg画布；命中时只清空各坐标轴。
+        matplotlib的Figure非线程安全，池按线程隔离：返回的Figure
+        只归当前线程使用，渲染和保存全程不与其他线程共享。
+        :param nrows: 子图行数
+        :param figsize: 图像尺寸（英寸）
+        :param height_ratios: 各子图高度比例
+        :return: (fig, axes列表)
+        """
+        cache = getattr(self._fig_local, 'cache', None)
+        if cache is None:
+            cache = self._fig_local.cache = {}
+
+        key = (nrows, figsize, height_ratios)
+        fig = cache.get(key)
+        if fig is None:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            gridspec_kw = ({'height_ratios': list(height_ratios)}
+                           if height_ratios else None)
+            fig.subplots(nrows, 1, gridspec_kw=gridspec_kw)
+            cache[key] = fig
+        else:
+            for ax in fig.axes:
+                ax.cla()
+        return fig, fig.axes
+
+    def _discard_figures(self):
+        """丢弃当前线程池中的Figure（渲染异常后避免复用脏状态）"""
+        self._fig_local.cache = {}
+
+    def _load_manifest(self) -> dict:
+        """读取图表缓存清单，不存在或损坏时返回空表"""
         try:
-            plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
-        except:
-            self.logger.warning("中文字体设置失败，使用默认字体")
+            with open(self._manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _df_fingerprint(df: pd.DataFrame) -> str:
+        """计算DataFrame内容指纹
+
+        pandas逐行哈希是向量化的，外层blake2b比md5更快；
+        指纹一致即数据未变，可以直接复用已生成的图表文件。
+        """
+        hashed = pd.util.hash_pandas_object(df, index=True)
+        return hashlib.blake2b(hashed.to_numpy().tobytes(),
+                               digest_size=16).hexdigest()
+
+    def _cached_chart(self, symbol: str, chart_type: str, fp: str) -> Optional[str]:
+        """查询缓存的图表文件，文件已被删除时视为未命中"""
+        path = self._chart_cache.get(f'{symbol}:{chart_type}:{fp}')
+        if path and os.path.exists(path):
+            self.logger.info(f"{symbol}的{chart_type}图表数据未变化，复用 {path}")
+            return path
+        return None
+
+    def _remember_chart(self, symbol: str, chart_type: str, fp: str, path: str):
+        """记录生成结果并落盘manifest（加锁写入+原子替换）"""
+        with self._manifest_lock:
+            self._chart_cache[f'{symbol}:{chart_type}:{fp}'] = path
+            try:
+                # 临时文件名带pid，多进程同时落盘时互不干扰
+                tmp = f'{self._manifest_path}.{os.getpid()}.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self._chart_cache, f, ensure_ascii=False)
+                os.replace(tmp, self._manifest_path)
+            except OSError as e:
+                self.logger.warning(f"写入图表缓存清单失败: {e}")
+
+    def _decimate(self, df: pd.DataFrame, dates, anchor: str,
+                  width_in: float, dpi: int = None):
+        """超长序列在绘图前按锚定列降采样
+
+        以锚定列（如close）计算一份MinMax索引，整个DataFrame按同一
+        索引切片，保证各条曲线/柱状图在x轴上对齐。日线级别数据远低于
+        阈值时原样返回，不产生任何拷贝。
+        :param df: 股票数据
+        :param dates: 与df对齐的x轴序列
+        :param anchor: 用于选点的锚定列名
+        :param width_in: 图宽（英寸），阈值取约2倍像素宽度
+        :param dpi: 输出分辨率
+        :return: (dates, df)，必要时为降采样后的切片
+        """
+        n_out = int(width_in * (dpi or self.dpi) * 2)
+        if len(df) <= n_out or anchor not in df.columns:
+            return dates, df
+
+        values = df[anchor].to_numpy(dtype=np.float64)
+        x = np.asarray(dates)
+        if _lttb_indices_jit is not None and x.dtype.kind in 'if' and n_out >= 3:
+            idx = _lttb_indices_jit(x.astype(np.float64), values, n_out)
+        else:
+            idx = _downsample_indices(values, n_out)
+        if idx is None:
+            return dates, df
+
+        return x[idx], df.iloc[idx]
+
+    @staticmethod
+    def _get_dates(df: pd.DataFrame):
+        """取x轴坐标数组（不修改调用方DataFrame）
+
+        旧实现在每个图表方法里都执行df['date'] = pd.to_datetime(...)，
+        同一DataFrame画5张图就转换5次，还会改写调用方的数据。
+        日期在这里一次性转成matplotlib浮点坐标（date2num），后续
+        plot/bar直接消费数值数组，完全绕开matplotlib的日期单位
+        转换器——那是pandas时间序列绘图公认的热点路径。
+        :param df: 股票数据
+        :return: 浮点日期坐标数组或DataFrame索引
+        """
+        if 'date' in df.columns:
+            dates = df['date']
+            # is_datetime64_any_dtype同时覆盖tz-aware列；
+            # cache=True让重复出现的日期字符串只解析一次
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, errors='coerce', cache=True)
+            return mdates.date2num(dates.to_numpy())
+
+        index = df.index
+        if isinstance(index, pd.DatetimeIndex):
+            return mdates.date2num(index.to_numpy())
+        return index
+
+    @staticmethod
+    def _apply_date_axis(ax):
+        """给数值化的日期x轴装上自动日期刻度
+
+        x轴传入的是date2num浮点数，刻度定位/格式化显式指定；
+        AutoDateLocator限制刻度数量上限，避免MonthLocator在长
+        时间跨度下逐月生成刻度。
+        """
+        locator = mdates.AutoDateLocator(maxticks=10)
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
+    @staticmethod
+    def _add_lines(ax, xnum, df, cols, labels, linewidth=1):
+        """用LineCollection把同一面板的多条曲线合成一次绘制
+
+        逐列ax.plot每条线都要走一遍Artist装配流程；LineCollection把
+        整组曲线作为单个artist提交给Agg。它不参与图例收集，用空线段
+        代理句柄补回各条曲线的图例项。
+        :param xnum: 共享的x轴坐标
+        :param cols: 要绘制的列名（调用方已过滤掉空列）
+        :param labels: 与cols对应的图例文本
+        """
+        if not cols:
+            return
+
+        x = np.asarray(xnum, dtype=np.float64)
+        segs = [np.column_stack([x, df[c].to_numpy(dtype=np.float64)])
+                for c in cols]
+        colors = [f'C{i}' for i in range(len(segs))]
+        ax.add_collection(LineCollection(segs, linewidths=linewidth, colors=colors))
+        ax.autoscale_view()
+        for color, label in zip(colors, labels):
+            ax.plot([], [], color=color, linewidth=linewidth, label=label)
+
+    @staticmethod
+    def _add_bars(ax, xnum, heights, colors, alpha=0.6, width=0.8):
+        """用PolyCollection一次性绘制整组柱子
+
+        ax.bar为每根柱子构造一个Rectangle patch，数千根柱子时patch
+        创建本身就是热点；这里把全部柱子的四个顶点装进一个(n,4,2)
+        数组，作为单个PolyCollection提交给Agg。
+        :param xnum: 柱子中心的x坐标
+        :param heights: 柱高（可含NaN，按0处理）
+        :param colors: 单个颜色或逐柱颜色数组
+        """
+        x = np.asarray(xnum, dtype=np.float64)
+        if x.size == 0:
+            return
+
+        h = np.asarray(heights, dtype=np.float64)
+        h = np.where(np.isnan(h), 0.0, h)
+        half = width / 2.0
+
+        verts = np.zeros((x.size, 4, 2))
+        verts[:, 0, 0] = x - half
+        verts[:, 1, 0] = x - half
+        verts[:, 2, 0] = x + half
+        verts[:, 3, 0] = x + half
+        verts[:, 1, 1] = h
+        verts[:, 2, 1] = h
+
+        ax.add_collection(PolyCollection(verts, facecolors=colors, alpha=alpha))
+        ax.update_datalim([(x.min() - half, min(h.min(), 0.0)),
+                           (x.max() + half, max(h.max(), 0.0))])
+        ax.autoscale_view()
     
     def create_price_chart(self, df: pd.DataFrame, symbol: str, save_path: str = None) -> Optional[str]:
         """
@@ -56,36 +412,45 @@ class ChartGenerator:
                 self.logger.warning(f"股票{symbol}数据为空，无法生成图表")
                 return None
             
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), 
-                                          gridspec_kw={'height_ratios': [3, 1]})
+            # 数据未变化时直接复用上次生成的图表
+            fp = None
+            if save_path is None:
+                fp = self._df_fingerprint(df)
+                cached = self._cached_chart(symbol, 'price', fp)
+                if cached:
+                    return cached
+
+            fig, (ax1, ax2) = self._get_figure(2, (12, 8), height_ratios=(3, 1))
             
             # 转换日期
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
-                dates = df['date']
-            else:
-                dates = df.index
-            
+            dates = self._get_dates(df)
+
+            dates, df = self._decimate(df, dates, 'close', width_in=12)
+
+            # 一次向量化扫描得到各列是否有数据，
+            # 替代逐列isna().all()的重复全列扫描
+            avail = df.notna().any().to_dict()
+            has = avail.get
+
             # 主图：价格和移动平均线
             ax1.plot(dates, df['close'], label='收盘价', linewidth=1.5, color='black')
             
             # 添加移动平均线
-            if 'ma5' in df.columns and not df['ma5'].isna().all():
+            if has('ma5', False):
                 ax1.plot(dates, df['ma5'], label='MA5', linewidth=1, alpha=0.8)
-            if 'ma10' in df.columns and not df['ma10'].isna().all():
+            if has('ma10', False):
                 ax1.plot(dates, df['ma10'], label='MA10', linewidth=1, alpha=0.8)
-            if 'ma20' in df.columns and not df['ma20'].isna().all():
+            if has('ma20', False):
                 ax1.plot(dates, df['ma20'], label='MA20', linewidth=1, alpha=0.8)
-            if 'ma60' in df.columns and not df['ma60'].isna().all():
+            if has('ma60', False):
                 ax1.plot(dates, df['ma60'], label='MA60', linewidth=1, alpha=0.8)
             
             # 添加布林带
-            if all(col in df.columns for col in ['boll_upper', 'boll_middle', 'boll_lower']):
-                if not df['boll_upper'].isna().all():
-                    ax1.plot(dates, df['boll_upper'], '--', alpha=0.5, color='red', label='布林上轨')
-                    ax1.plot(dates, df['boll_middle'], '--', alpha=0.5, color='blue', label='布林中轨')
-                    ax1.plot(dates, df['boll_lower'], '--', alpha=0.5, color='green', label='布林下轨')
-                    ax1.fill_between(dates, df['boll_upper'], df['boll_lower'], alpha=0.1, color='blue')
+            if all(has(col, False) for col in ('boll_upper', 'boll_middle', 'boll_lower')):
+                ax1.plot(dates, df['boll_upper'], '--', alpha=0.5, color='red', label='布林上轨')
+                ax1.plot(dates, df['boll_middle'], '--', alpha=0.5, color='blue', label='布林中轨')
+                ax1.plot(dates, df['boll_lower'], '--', alpha=0.5, color='green', label='布林下轨')
+                ax1.fill_between(dates, df['boll_upper'], df['boll_lower'], alpha=0.1, color='blue')
             
             ax1.set_title(f'{symbol} 股价走势图')
             ax1.set_ylabel('价格 (元)')
@@ -93,26 +458,23 @@ class ChartGenerator:
             ax1.grid(True, alpha=0.3)
             
             # 副图：成交量
-            if 'volume' in df.columns and not df['volume'].isna().all():
-                colors = ['red' if close >= open_price else 'green' 
-                         for close, open_price in zip(df['close'], df['open']) 
-                         if pd.notna(close) and pd.notna(open_price)]
-                
-                # 如果颜色数量不匹配，使用默认颜色
-                if len(colors) != len(df):
-                    colors = ['blue'] * len(df)
-                    
-                ax2.bar(dates, df['volume'], color=colors, alpha=0.6, width=0.8)
+            if has('volume', False):
+                # 向量化计算涨跌颜色，缺失值回退为蓝色
+                c = df['close'].to_numpy(dtype=np.float64)
+                o = df['open'].to_numpy(dtype=np.float64)
+                colors = np.where(c >= o, 'red', 'green').astype(object)
+                colors[np.isnan(c) | np.isnan(o)] = 'blue'
+
+                self._add_bars(ax2, dates, df['volume'], colors)
                 
                 # 添加成交量均线
-                if 'vol_ma5' in df.columns and not df['vol_ma5'].isna().all():
+                if has('vol_ma5', False):
                     ax2.plot(dates, df['vol_ma5'], label='成交量MA5', linewidth=1)
-                if 'vol_ma10' in df.columns and not df['vol_ma10'].isna().all():
+                if has('vol_ma10', False):
                     ax2.plot(dates, df['vol_ma10'], label='成交量MA10', linewidth=1)
                 
                 ax2.set_ylabel('成交量')
-                if any(col in df.columns and not df[col].isna().all() 
-                      for col in ['vol_ma5', 'vol_ma10']):
+                if has('vol_ma5', False) or has('vol_ma10', False):
                     ax2.legend()
             else:
                 ax2.set_ylabel('成交量')
@@ -123,27 +485,32 @@ class ChartGenerator:
             ax2.grid(True, alpha=0.3)
             
             # 设置x轴日期格式
-            ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-            ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-            ax1.xaxis.set_major_locator(mdates.MonthLocator())
-            ax2.xaxis.set_major_locator(mdates.MonthLocator())
-            
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            
+            self._apply_date_axis(ax1)
+            self._apply_date_axis(ax2)
+            
+            ax1.tick_params(axis='x', labelrotation=45)
+            ax2.tick_params(axis='x', labelrotation=45)
+            # 固定边距代替tight_layout：布局求解器要对每个artist做
+            # 文本测量，固定布局的图表直接用预先算好的边距
+            fig.subplots_adjust(left=0.08, right=0.97, top=0.95,
+                                bottom=0.12, hspace=0.3)
+
             # 保存图表
             if save_path is None:
                 save_path = os.path.join(self.output_dir, f'{symbol}_price_chart.png')
-            
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
+
+            fig.savefig(save_path, dpi=self.dpi,
+                        pil_kwargs={'compress_level': 1, 'optimize': False})
+
+            if fp:
+                self._remember_chart(symbol, 'price', fp, save_path)
+
             self.logger.info(f"价格图表生成成功: {save_path}")
             return save_path
-            
+
         except Exception as e:
             self.logger.error(f"生成{symbol}价格图表失败: {e}")
-            plt.close('all')  # 清理图表
+            self._discard_figures()  # 清理图表
             return None
     
     def create_macd_chart(self, df: pd.DataFrame, symbol: str, save_path: str = None) -> Optional[str]:
@@ -157,17 +524,25 @@ class ChartGenerator:
             if not symbol or not isinstance(symbol, str):
                 raise ValueError("股票代码不能为空且必须是字符串")
             
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
-                dates = df['date']
-            else:
-                dates = df.index
+            # 数据未变化时直接复用上次生成的图表
+            fp = None
+            if save_path is None:
+                fp = self._df_fingerprint(df)
+                cached = self._cached_chart(symbol, 'macd', fp)
+                if cached:
+                    return cached
+
+            fig, (ax,) = self._get_figure(1, (12, 6))
             
-            # 检查是否有MACD相关数据
-            has_macd_data = any(col in df.columns and not df[col].isna().all() 
-                               for col in ['macd', 'macd_signal', 'macd_histogram'])
+            dates = self._get_dates(df)
+
+            dates, df = self._decimate(df, dates, 'macd', width_in=12)
+
+            # 一次向量化扫描各列是否有数据
+            avail = df.notna().any().to_dict()
+            has = avail.get
+            has_macd_data = any(has(col, False)
+                                for col in ('macd', 'macd_signal', 'macd_histogram'))
             
             if not has_macd_data:
                 ax.text(0.5, 0.5, '无MACD指标数据', 
@@ -175,15 +550,18 @@ class ChartGenerator:
                        fontsize=14, alpha=0.5)
             else:
                 # MACD线和信号线
-                if 'macd' in df.columns and not df['macd'].isna().all():
+                if has('macd', False):
                     ax.plot(dates, df['macd'], label='MACD', linewidth=1.5)
-                if 'macd_signal' in df.columns and not df['macd_signal'].isna().all():
+                if has('macd_signal', False):
                     ax.plot(dates, df['macd_signal'], label='信号线', linewidth=1.5)
                 
                 # MACD柱状图
-                if 'macd_histogram' in df.columns and not df['macd_histogram'].isna().all():
-                    colors = ['red' if pd.notna(x) and x >= 0 else 'green' for x in df['macd_histogram']]
-                    ax.bar(dates, df['macd_histogram'], color=colors, alpha=0.6, width=0.8, label='MACD柱')
+                if has('macd_histogram', False):
+                    h = df['macd_histogram'].to_numpy(dtype=np.float64)
+                    colors = np.where(np.isnan(h) | (h < 0), 'green', 'red')
+                    self._add_bars(ax, dates, df['macd_histogram'], colors)
+                    # PolyCollection不进图例，用代理句柄补回
+                    ax.plot([], [], color='red', linewidth=5, label='MACD柱')
             
             ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
             ax.set_title(f'{symbol} MACD指标')
@@ -191,23 +569,25 @@ class ChartGenerator:
             ax.legend()
             ax.grid(True, alpha=0.3)
             
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-            ax.xaxis.set_major_locator(mdates.MonthLocator())
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            
+            self._apply_date_axis(ax)
+            ax.tick_params(axis='x', labelrotation=45)
+            fig.subplots_adjust(left=0.08, right=0.97, top=0.93, bottom=0.15)
+
             if save_path is None:
                 save_path = os.path.join(self.output_dir, f'{symbol}_macd_chart.png')
+
+            fig.savefig(save_path, dpi=self.dpi,
+                        pil_kwargs={'compress_level': 1, 'optimize': False})
             
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
+            if fp:
+                self._remember_chart(symbol, 'macd', fp, save_path)
+
             self.logger.info(f"MACD图表生成成功: {save_path}")
             return save_path
             
         except Exception as e:
             self.logger.error(f"生成{symbol}的MACD图表失败: {e}")
-            plt.close('all')  # 确保清理所有图表资源
+            self._discard_figures()  # 确保清理图表资源
             return None
     
     def create_rsi_chart(self, df: pd.DataFrame, symbol: str, save_path: str = None) -> Optional[str]:
@@ -221,16 +601,24 @@ class ChartGenerator:
             if not symbol or not isinstance(symbol, str):
                 raise ValueError("股票代码不能为空且必须是字符串")
             
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
-                dates = df['date']
-            else:
-                dates = df.index
+            # 数据未变化时直接复用上次生成的图表
+            fp = None
+            if save_path is None:
+                fp = self._df_fingerprint(df)
+                cached = self._cached_chart(symbol, 'rsi', fp)
+                if cached:
+                    return cached
+
+            fig, (ax,) = self._get_figure(1, (12, 6))
             
-            # 检查RSI数据
-            if 'rsi' not in df.columns or df['rsi'].isna().all():
+            dates = self._get_dates(df)
+
+            dates, df = self._decimate(df, dates, 'rsi', width_in=12)
+
+            # 检查RSI数据：numpy层一次isnan扫描，不走pandas逐元素分发
+            has_rsi = ('rsi' in df.columns and
+                       not np.isnan(df['rsi'].to_numpy(dtype=np.float64)).all())
+            if not has_rsi:
                 ax.text(0.5, 0.5, '无RSI指标数据', 
                        transform=ax.transAxes, ha='center', va='center', 
                        fontsize=14, alpha=0.5)
@@ -252,23 +640,25 @@ class ChartGenerator:
             ax.legend()
             ax.grid(True, alpha=0.3)
             
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-            ax.xaxis.set_major_locator(mdates.MonthLocator())
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            
+            self._apply_date_axis(ax)
+            ax.tick_params(axis='x', labelrotation=45)
+            fig.subplots_adjust(left=0.08, right=0.97, top=0.93, bottom=0.15)
+
             if save_path is None:
                 save_path = os.path.join(self.output_dir, f'{symbol}_rsi_chart.png')
+
+            fig.savefig(save_path, dpi=self.dpi,
+                        pil_kwargs={'compress_level': 1, 'optimize': False})
             
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
+            if fp:
+                self._remember_chart(symbol, 'rsi', fp, save_path)
+
             self.logger.info(f"RSI图表生成成功: {save_path}")
             return save_path
             
         except Exception as e:
             self.logger.error(f"生成{symbol}的RSI图表失败: {e}")
-            plt.close('all')  # 确保清理所有图表资源
+            self._discard_figures()  # 确保清理图表资源
             return None
     
     def create_kdj_chart(self, df: pd.DataFrame, symbol: str, save_path: str = None) -> Optional[str]:
@@ -282,28 +672,36 @@ class ChartGenerator:
             if not symbol or not isinstance(symbol, str):
                 raise ValueError("股票代码不能为空且必须是字符串")
             
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
-                dates = df['date']
-            else:
-                dates = df.index
+            # 数据未变化时直接复用上次生成的图表
+            fp = None
+            if save_path is None:
+                fp = self._df_fingerprint(df)
+                cached = self._cached_chart(symbol, 'kdj', fp)
+                if cached:
+                    return cached
+
+            fig, (ax,) = self._get_figure(1, (12, 6))
             
-            # 检查KDJ数据
-            has_kdj_data = any(col in df.columns and not df[col].isna().all() 
-                              for col in ['kdj_k', 'kdj_d', 'kdj_j'])
+            dates = self._get_dates(df)
+
+            dates, df = self._decimate(df, dates, 'kdj_k', width_in=12)
+
+            # 一次向量化扫描各列是否有数据
+            avail = df.notna().any().to_dict()
+            has = avail.get
+            has_kdj_data = any(has(col, False)
+                               for col in ('kdj_k', 'kdj_d', 'kdj_j'))
             
             if not has_kdj_data:
                 ax.text(0.5, 0.5, '无KDJ指标数据', 
                        transform=ax.transAxes, ha='center', va='center', 
                        fontsize=14, alpha=0.5)
             else:
-                if 'kdj_k' in df.columns and not df['kdj_k'].isna().all():
+                if has('kdj_k', False):
                     ax.plot(dates, df['kdj_k'], label='K线', linewidth=1.5)
-                if 'kdj_d' in df.columns and not df['kdj_d'].isna().all():
+                if has('kdj_d', False):
                     ax.plot(dates, df['kdj_d'], label='D线', linewidth=1.5)
-                if 'kdj_j' in df.columns and not df['kdj_j'].isna().all():
+                if has('kdj_j', False):
                     ax.plot(dates, df['kdj_j'], label='J线', linewidth=1.5)
             
             # 添加参考线
@@ -317,25 +715,140 @@ class ChartGenerator:
             ax.legend()
             ax.grid(True, alpha=0.3)
             
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-            ax.xaxis.set_major_locator(mdates.MonthLocator())
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            
+            self._apply_date_axis(ax)
+            ax.tick_params(axis='x', labelrotation=45)
+            fig.subplots_adjust(left=0.08, right=0.97, top=0.93, bottom=0.15)
+
             if save_path is None:
                 save_path = os.path.join(self.output_dir, f'{symbol}_kdj_chart.png')
+
+            fig.savefig(save_path, dpi=self.dpi,
+                        pil_kwargs={'compress_level': 1, 'optimize': False})
             
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
+            if fp:
+                self._remember_chart(symbol, 'kdj', fp, save_path)
+
             self.logger.info(f"KDJ图表生成成功: {save_path}")
             return save_path
             
         except Exception as e:
             self.logger.error(f"生成{symbol}的KDJ图表失败: {e}")
-            plt.close('all')  # 确保清理所有图表资源
+            self._discard_figures()  # 确保清理图表资源
             return None
     
+
+    def _draw_price_panel(self, ax, dates, df, nonempty, symbol):
+        """综合图面板：价格、均线与布林带"""
+        if nonempty.get('close', False):
+            ax.plot(dates, df['close'], label='收盘价', linewidth=1.5, color='black')
+
+            ma_cols = [c for c in ('ma5', 'ma20', 'ma60') if nonempty.get(c, False)]
+            self._add_lines(ax, dates, df, ma_cols,
+                            [c.upper() for c in ma_cols])
+
+            # 布林带
+            if nonempty.get('boll_upper', False) and nonempty.get('boll_lower', False):
+                ax.fill_between(dates, df['boll_upper'], df['boll_lower'],
+                                alpha=0.1, color='blue', label='布林带')
+        else:
+            ax.text(0.5, 0.5, '无价格数据',
+                    transform=ax.transAxes, ha='center', va='center',
+                    fontsize=14, alpha=0.5)
+
+        ax.set_title(f'{symbol} 技术分析综合图')
+        ax.set_ylabel('价格 (元)')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    def _draw_macd_panel(self, ax, dates, df, nonempty, symbol):
+        """综合图面板：MACD"""
+        if any(nonempty.get(c, False) for c in ('macd', 'macd_signal', 'macd_histogram')):
+            macd_labels = {'macd': 'MACD', 'macd_signal': '信号线'}
+            macd_cols = [c for c in ('macd', 'macd_signal') if nonempty.get(c, False)]
+            self._add_lines(ax, dates, df, macd_cols,
+                            [macd_labels[c] for c in macd_cols])
+
+            if nonempty.get('macd_histogram', False):
+                h = df['macd_histogram'].to_numpy(dtype=np.float64)
+                colors = np.where(np.isnan(h) | (h < 0), 'green', 'red')
+                self._add_bars(ax, dates, df['macd_histogram'], colors)
+        else:
+            ax.text(0.5, 0.5, '无MACD数据',
+                    transform=ax.transAxes, ha='center', va='center',
+                    fontsize=12, alpha=0.5)
+
+        ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+        ax.set_ylabel('MACD')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    def _draw_rsi_panel(self, ax, dates, df, nonempty, symbol):
+        """综合图面板：RSI"""
+        if nonempty.get('rsi', False):
+            ax.plot(dates, df['rsi'], label='RSI', linewidth=1, color='purple')
+            ax.axhline(y=70, color='red', linestyle='--', alpha=0.7)
+            ax.axhline(y=30, color='green', linestyle='--', alpha=0.7)
+            ax.fill_between(dates, 70, 100, alpha=0.1, color='red')
+            ax.fill_between(dates, 0, 30, alpha=0.1, color='green')
+        else:
+            ax.text(0.5, 0.5, '无RSI数据',
+                    transform=ax.transAxes, ha='center', va='center',
+                    fontsize=12, alpha=0.5)
+
+        ax.set_ylabel('RSI')
+        ax.set_ylim(0, 100)
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    def _draw_kdj_panel(self, ax, dates, df, nonempty, symbol):
+        """综合图面板：KDJ"""
+        if any(nonempty.get(c, False) for c in ('kdj_k', 'kdj_d', 'kdj_j')):
+            kdj_cols = [c for c in ('kdj_k', 'kdj_d', 'kdj_j') if nonempty.get(c, False)]
+            self._add_lines(ax, dates, df, kdj_cols,
+                            [c[-1].upper() for c in kdj_cols])
+
+            ax.axhline(y=80, color='red', linestyle='--', alpha=0.7)
+            ax.axhline(y=20, color='green', linestyle='--', alpha=0.7)
+        else:
+            ax.text(0.5, 0.5, '无KDJ数据',
+                    transform=ax.transAxes, ha='center', va='center',
+                    fontsize=12, alpha=0.5)
+
+        ax.set_ylabel('KDJ')
+        ax.set_ylim(0, 100)
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    def _render_panel(self, kind, df, dates, nonempty, symbol, height):
+        """在独立Figure上渲染单个面板并返回RGBA像素
+
+        各面板使用互不共享的Figure+Agg画布，线程安全；Agg光栅化
+        在C层执行时释放GIL，四个面板可以在线程池里真正并行。
+        :param kind: 面板类型（price/macd/rsi/kdj）
+        :param height: 面板高度（英寸）
+        :return: (H, W, 4)的uint8像素数组
+        """
+        fig = Figure(figsize=(15, height), dpi=self.dpi)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+
+        draw = {
+            'price': self._draw_price_panel,
+            'macd': self._draw_macd_panel,
+            'rsi': self._draw_rsi_panel,
+            'kdj': self._draw_kdj_panel,
+        }[kind]
+        draw(ax, dates, df, nonempty, symbol)
+
+        self._apply_date_axis(ax)
+        ax.tick_params(axis='x', labelrotation=45)
+        # 预计算边距：上下按英寸折算成比例，免去tight_layout的
+        # 逐artist文本测量
+        fig.subplots_adjust(left=0.06, right=0.98,
+                            top=1 - 0.35 / height, bottom=0.55 / height)
+        canvas.draw()
+        return np.asarray(canvas.buffer_rgba())
+
     def create_comprehensive_chart(self, df: pd.DataFrame, symbol: str, save_path: str = None) -> Optional[str]:
         """创建综合技术分析图表"""
         try:
@@ -347,132 +860,131 @@ class ChartGenerator:
             if not symbol or not isinstance(symbol, str):
                 raise ValueError("股票代码不能为空且必须是字符串")
             
-            fig, axes = plt.subplots(4, 1, figsize=(15, 12), 
-                                    gridspec_kw={'height_ratios': [3, 1, 1, 1]})
-            
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
-                dates = df['date']
-            else:
-                dates = df.index
-            
-            # 1. 价格和移动平均线
-            ax1 = axes[0]
-            if 'close' in df.columns and not df['close'].isna().all():
-                ax1.plot(dates, df['close'], label='收盘价', linewidth=1.5, color='black')
-                
-                if 'ma5' in df.columns and not df['ma5'].isna().all():
-                    ax1.plot(dates, df['ma5'], label='MA5', linewidth=1)
-                if 'ma20' in df.columns and not df['ma20'].isna().all():
-                    ax1.plot(dates, df['ma20'], label='MA20', linewidth=1)
-                if 'ma60' in df.columns and not df['ma60'].isna().all():
-                    ax1.plot(dates, df['ma60'], label='MA60', linewidth=1)
-                
-                # 布林带
-                if all(col in df.columns and not df[col].isna().all() 
-                      for col in ['boll_upper', 'boll_lower']):
-                    ax1.fill_between(dates, df['boll_upper'], df['boll_lower'], 
-                                   alpha=0.1, color='blue', label='布林带')
-            else:
-                ax1.text(0.5, 0.5, '无价格数据', 
-                        transform=ax1.transAxes, ha='center', va='center', 
-                        fontsize=14, alpha=0.5)
-            
-            ax1.set_title(f'{symbol} 技术分析综合图')
-            ax1.set_ylabel('价格 (元)')
-            ax1.legend()
-            ax1.grid(True, alpha=0.3)
-            
-            # 2. MACD
-            ax2 = axes[1]
-            has_macd = any(col in df.columns and not df[col].isna().all() 
-                          for col in ['macd', 'macd_signal', 'macd_histogram'])
-            
-            if has_macd:
-                if 'macd' in df.columns and not df['macd'].isna().all():
-                    ax2.plot(dates, df['macd'], label='MACD', linewidth=1)
-                if 'macd_signal' in df.columns and not df['macd_signal'].isna().all():
-                    ax2.plot(dates, df['macd_signal'], label='信号线', linewidth=1)
-                if 'macd_histogram' in df.columns and not df['macd_histogram'].isna().all():
-                    colors = ['red' if pd.notna(x) and x >= 0 else 'green' for x in df['macd_histogram']]
-                    ax2.bar(dates, df['macd_histogram'], color=colors, alpha=0.6, width=0.8)
-            else:
-                ax2.text(0.5, 0.5, '无MACD数据', 
-                        transform=ax2.transAxes, ha='center', va='center', 
-                        fontsize=12, alpha=0.5)
-            
-            ax2.axhline(y=0, color='black', linestyle='-', alpha=0.3)
-            ax2.set_ylabel('MACD')
-            ax2.legend()
-            ax2.grid(True, alpha=0.3)
-            
-            # 3. RSI
-            ax3 = axes[2]
-            if 'rsi' in df.columns and not df['rsi'].isna().all():
-                ax3.plot(dates, df['rsi'], label='RSI', linewidth=1, color='purple')
-                ax3.axhline(y=70, color='red', linestyle='--', alpha=0.7)
-                ax3.axhline(y=30, color='green', linestyle='--', alpha=0.7)
-                ax3.fill_between(dates, 70, 100, alpha=0.1, color='red')
-                ax3.fill_between(dates, 0, 30, alpha=0.1, color='green')
-            else:
-                ax3.text(0.5, 0.5, '无RSI数据', 
-                        transform=ax3.transAxes, ha='center', va='center', 
-                        fontsize=12, alpha=0.5)
-            
-            ax3.set_ylabel('RSI')
-            ax3.set_ylim(0, 100)
-            ax3.legend()
-            ax3.grid(True, alpha=0.3)
-            
-            # 4. KDJ
-            ax4 = axes[3]
-            has_kdj = any(col in df.columns and not df[col].isna().all() 
-                         for col in ['kdj_k', 'kdj_d', 'kdj_j'])
-            
-            if has_kdj:
-                if 'kdj_k' in df.columns and not df['kdj_k'].isna().all():
-                    ax4.plot(dates, df['kdj_k'], label='K', linewidth=1)
-                if 'kdj_d' in df.columns and not df['kdj_d'].isna().all():
-                    ax4.plot(dates, df['kdj_d'], label='D', linewidth=1)
-                if 'kdj_j' in df.columns and not df['kdj_j'].isna().all():
-                    ax4.plot(dates, df['kdj_j'], label='J', linewidth=1)
-                    
-                ax4.axhline(y=80, color='red', linestyle='--', alpha=0.7)
-                ax4.axhline(y=20, color='green', linestyle='--', alpha=0.7)
-            else:
-                ax4.text(0.5, 0.5, '无KDJ数据', 
-                        transform=ax4.transAxes, ha='center', va='center', 
-                        fontsize=12, alpha=0.5)
-            
-            ax4.set_ylabel('KDJ')
-            ax4.set_ylim(0, 100)
-            ax4.legend()
-            ax4.grid(True, alpha=0.3)
-            
-            # 设置x轴
-            for ax in axes:
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-                ax.xaxis.set_major_locator(mdates.MonthLocator())
-            
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            
+            # 数据未变化时直接复用上次生成的图表
+            fp = None
+            if save_path is None:
+                fp = self._df_fingerprint(df)
+                cached = self._cached_chart(symbol, 'comprehensive', fp)
+                if cached:
+                    return cached
+
+            dates = self._get_dates(df)
+
+            dates, df = self._decimate(df, dates, 'close', width_in=15)
+
+            # 一次向量化扫描得到全部列是否有数据，各面板直接查字典
+            nonempty = df.notna().any().to_dict()
+
+            # 四个面板在线程池里并行渲染到各自的Agg缓冲，
+            # 主线程把RGBA像素纵向拼接后用Pillow一次性编码
+            panels = (('price', 6.0), ('macd', 2.0), ('rsi', 2.0), ('kdj', 2.0))
+
+            def render(panel):
+                kind, height = panel
+                return self._render_panel(kind, df, dates, nonempty, symbol, height)
+
+            with ThreadPoolExecutor(max_workers=len(panels)) as pool:
+                image = np.vstack(list(pool.map(render, panels)))
+
             if save_path is None:
                 save_path = os.path.join(self.output_dir, f'{symbol}_comprehensive_chart.png')
-            
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
+
+            Image.fromarray(image).save(save_path, 'PNG',
+                                        optimize=False, compress_level=1)
+
+            if fp:
+                self._remember_chart(symbol, 'comprehensive', fp, save_path)
+
             self.logger.info(f"综合图表生成成功: {save_path}")
             return save_path
             
         except Exception as e:
             self.logger.error(f"生成{symbol}的综合图表失败: {e}")
-            plt.close('all')  # 确保清理所有图表资源
+            self._discard_figures()  # 确保清理图表资源
             return None
     
-    def create_simple_chart(self, df: pd.DataFrame, symbol: str, chart_type: str = "price") -> Optional[str]:
-        """创建简单图表（用于Web显示）"""
+
+    def create_all_charts(self, df: pd.DataFrame, symbol: str) -> Dict[str, str]:
+        """一次渲染生成price/macd/rsi/kdj四张图表
+
+        调用方通常同时需要这四张图。与分别调用四个create_*相比，
+        这里共用一次日期转换、降采样和列可用性扫描，并且整figure
+        只做一次Agg光栅化：渲染完成后按各子图的tight bbox从像素
+        缓冲裁剪，分别编码成独立PNG。
+        :param df: 股票数据
+        :param symbol: 股票代码
+        :return: 图表类型到文件路径的映射（失败的类型不在其中）
+        """
+        charts = {}
+        try:
+            if df is None or df.empty:
+                self.logger.warning(f"股票{symbol}数据为空，无法生成图表")
+                return charts
+
+            kinds = ('price', 'macd', 'rsi', 'kdj')
+
+            # 数据未变化时整组复用
+            fp = self._df_fingerprint(df)
+            cached = {k: self._cached_chart(symbol, k, fp) for k in kinds}
+            if all(cached.values()):
+                return cached
+
+            dates = self._get_dates(df)
+            dates, df = self._decimate(df, dates, 'close', width_in=15)
+            nonempty = df.notna().any().to_dict()
+
+            fig = Figure(figsize=(15, 12), dpi=self.dpi)
+            canvas = FigureCanvasAgg(fig)
+            axes = fig.subplots(4, 1, gridspec_kw={'height_ratios': [3, 1, 1, 1]})
+
+            draws = {
+                'price': self._draw_price_panel,
+                'macd': self._draw_macd_panel,
+                'rsi': self._draw_rsi_panel,
+                'kdj': self._draw_kdj_panel,
+            }
+            for ax, kind in zip(axes, kinds):
+                draws[kind](ax, dates, df, nonempty, symbol)
+                self._apply_date_axis(ax)
+                ax.tick_params(axis='x', labelrotation=45)
+
+            fig.subplots_adjust(left=0.07, right=0.98, top=0.96,
+                                bottom=0.06, hspace=0.25)
+            canvas.draw()
+            image = np.asarray(canvas.buffer_rgba())
+            height, width = image.shape[:2]
+
+            renderer = canvas.get_renderer()
+            for ax, kind in zip(axes, kinds):
+                bbox = ax.get_tightbbox(renderer)
+                x0 = max(int(bbox.x0), 0)
+                x1 = min(int(np.ceil(bbox.x1)), width)
+                y0 = max(int(bbox.y0), 0)
+                y1 = min(int(np.ceil(bbox.y1)), height)
+
+                # bbox原点在左下角，像素数组原点在左上角，y轴需要翻转
+                crop = image[height - y1:height - y0, x0:x1]
+                path = os.path.join(self.output_dir, f'{symbol}_{kind}_chart.png')
+                Image.fromarray(crop).save(path, 'PNG',
+                                           optimize=False, compress_level=1)
+                self._remember_chart(symbol, kind, fp, path)
+                charts[kind] = path
+
+            self.logger.info(f"{symbol}的四张图表已在单次渲染中生成")
+            return charts
+
+        except Exception as e:
+            self.logger.error(f"批量生成{symbol}图表失败: {e}")
+            return charts
+
+    def create_simple_chart(self, df: pd.DataFrame, symbol: str, chart_type: str = "price",
+                            chart_format: str = "webp") -> Optional[str]:
+        """创建简单图表（用于Web显示）
+
+        :param chart_format: 输出格式，webp/svg/png。默认webp：体积比
+            PNG小2~3倍、编码也更快；svg完全跳过Agg光栅化，适合曲线
+            为主的图；png保留旧行为（64色调色板）
+        """
         try:
             # 输入参数验证
             if df is None or df.empty:
@@ -484,54 +996,86 @@ class ChartGenerator:
                 
             if chart_type not in ["price", "volume"]:
                 raise ValueError("图表类型必须是'price'或'volume'")
-            
-            plt.figure(figsize=(10, 6))
-            
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
-                dates = df['date']
-            else:
-                dates = df.index
-            
+
+            if chart_format not in ["webp", "svg", "png"]:
+                raise ValueError("图表格式必须是'webp'、'svg'或'png'")
+
+            # 数据未变化时直接复用上次生成的图表
+            fp = self._df_fingerprint(df)
+            cached = self._cached_chart(symbol, f'{chart_type}_simple_{chart_format}', fp)
+            if cached:
+                return cached
+
+            fig, (ax,) = self._get_figure(1, (10, 6))
+
+            dates = self._get_dates(df)
+
+            dates, df = self._decimate(df, dates, 'close', width_in=10, dpi=100)
+
+            # 一次向量化扫描各列是否有数据
+            avail = df.notna().any().to_dict()
+            has = avail.get
+
             if chart_type == "price":
-                if 'close' not in df.columns or df['close'].isna().all():
-                    plt.text(0.5, 0.5, '无价格数据', 
-                            transform=plt.gca().transAxes, ha='center', va='center', 
+                if not has('close', False):
+                    ax.text(0.5, 0.5, '无价格数据',
+                            transform=ax.transAxes, ha='center', va='center',
                             fontsize=14, alpha=0.5)
                 else:
-                    plt.plot(dates, df['close'], label='收盘价', linewidth=2)
-                    if 'ma5' in df.columns and not df['ma5'].isna().all():
-                        plt.plot(dates, df['ma5'], label='MA5', alpha=0.8)
-                    if 'ma20' in df.columns and not df['ma20'].isna().all():
-                        plt.plot(dates, df['ma20'], label='MA20', alpha=0.8)
-                        
-                plt.title(f'{symbol} 价格走势')
-                plt.ylabel('价格 (元)')
-            
+                    ax.plot(dates, df['close'], label='收盘价', linewidth=2)
+                    if has('ma5', False):
+                        ax.plot(dates, df['ma5'], label='MA5', alpha=0.8)
+                    if has('ma20', False):
+                        ax.plot(dates, df['ma20'], label='MA20', alpha=0.8)
+
+                ax.set_title(f'{symbol} 价格走势')
+                ax.set_ylabel('价格 (元)')
+
             elif chart_type == "volume":
-                if 'volume' not in df.columns or df['volume'].isna().all():
-                    plt.text(0.5, 0.5, '无成交量数据', 
-                            transform=plt.gca().transAxes, ha='center', va='center', 
+                if not has('volume', False):
+                    ax.text(0.5, 0.5, '无成交量数据',
+                            transform=ax.transAxes, ha='center', va='center',
                             fontsize=14, alpha=0.5)
                 else:
-                    plt.bar(dates, df['volume'], alpha=0.7)
-                    
-                plt.title(f'{symbol} 成交量')
-                plt.ylabel('成交量')
-            
-            plt.legend()
-            plt.grid(True, alpha=0.3)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            
-            save_path = os.path.join(self.output_dir, f'{symbol}_{chart_type}_simple.png')
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            plt.close()
-            
+                    self._add_bars(ax, dates, df['volume'], 'C0', alpha=0.7)
+
+                ax.set_title(f'{symbol} 成交量')
+                ax.set_ylabel('成交量')
+
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+            self._apply_date_axis(ax)
+            ax.tick_params(axis='x', labelrotation=45)
+            fig.subplots_adjust(left=0.1, right=0.97, top=0.93, bottom=0.15)
+
+            save_path = os.path.join(
+                self.output_dir, f'{symbol}_{chart_type}_simple.{chart_format}')
+
+            if chart_format == "svg":
+                # 矢量输出完全跳过Agg像素光栅化
+                fig.savefig(save_path, format='svg')
+            else:
+                # 先渲染到内存RGBA缓冲，再由Pillow编码目标格式
+                dpi = 100
+                buf = io.BytesIO()
+                fig.savefig(buf, format='rgba', dpi=dpi)
+                size = (int(fig.get_figwidth() * dpi), int(fig.get_figheight() * dpi))
+                img = Image.frombuffer('RGBA', size, buf.getbuffer(), 'raw', 'RGBA', 0, 1)
+
+                if chart_format == "webp":
+                    # method=0选择最快的编码路径，quality=70对折线图足够
+                    img.convert('RGB').save(save_path, 'WEBP', quality=70, method=0)
+                else:
+                    # 8bit调色板PNG比RGBA小约4倍，compress_level=1编码更快
+                    img = img.convert('P', palette=Image.ADAPTIVE, colors=64)
+                    img.save(save_path, 'PNG', optimize=False, compress_level=1)
+
+            self._remember_chart(symbol, f'{chart_type}_simple_{chart_format}', fp, save_path)
+
             self.logger.info(f"简单{chart_type}图表生成成功: {save_path}")
             return save_path
             
         except Exception as e:
             self.logger.error(f"生成{symbol}的简单{chart_type}图表失败: {e}")
-            plt.close('all')  # 确保清理所有图表资源
+            self._discard_figures()  # 确保清理图表资源
             return None
\ No newline at end of file
@@ -3,9 +3,14 @@
 整合数据获取、技术指标计算和图表生成
 """
 
+import json
+import os
+import time
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple
 import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
 from .technical_indicators import TechnicalIndicators
@@ -16,24 +21,79 @@ from ..database.manager import DatabaseManager
 
 class AnalysisEngine:
     """分析引擎"""
-    
+
+    # 多空信号全集（frozenset成员判断替代逐信号的子串扫描）
+    _POSITIVE_SIGNALS = frozenset({
+        'ma_golden_cross', 'macd_golden_cross', 'kdj_golden_cross',
+        'rsi_oversold', 'boll_breakthrough_lower'
+    })
+    _NEGATIVE_SIGNALS = frozenset({
+        'ma_death_cross', 'macd_death_cross', 'kdj_death_cross',
+        'rsi_overbought', 'boll_breakthrough_upper'
+    })
+
+    # 最新指标提取的列及展示精度（类级常量，每次调用不重建）
+    _INDICATOR_PRECISION = {
+        'ma5': 2, 'ma10': 2, 'ma20': 2, 'ma60': 2,
+        'macd': 4, 'macd_signal': 4, 'macd_histogram': 4,
+        'rsi': 2,
+        'kdj_k': 2, 'kdj_d': 2, 'kdj_j': 2,
+        'boll_upper': 2, 'boll_middle': 2, 'boll_lower': 2
+    }
+
+    # 图表渲染后台线程池（类级共享，按进程懒创建）：matplotlib渲染
+    # 主要在Agg的C层执行并释放GIL，可与摘要生成和数据库写入重叠。
+    # batch_analyze_stocks经fork产生的子进程会继承父进程的executor，
+    # 其工作线程在子进程中并不存在，直接复用会让submit永远排队，
+    # 因此按pid校验、fork后在本进程重建
+    _chart_executor = None
+    _chart_executor_pid = None
+
+    @classmethod
+    def _get_chart_executor(cls) -> ThreadPoolExecutor:
+        """获取当前进程的图表渲染线程池（fork后自动重建）"""
+        pid = os.getpid()
+        if cls._chart_executor is None or cls._chart_executor_pid != pid:
+            cls._chart_executor = ThreadPoolExecutor(max_workers=4)
+            cls._chart_executor_pid = pid
+        return cls._chart_executor
+
+
     def __init__(self, db_manager: DatabaseManager = None):
         self.technical_indicators = TechnicalIndicators()
         self.chart_generator = ChartGenerator()
         self.db_manager = db_manager or DatabaseManager()
         self.data_source_manager = get_data_source_manager()
         self.logger = logging.getLogger(__name__)
+        # 当日分析结果的进程内缓存：键为(symbol, period, days, 日期)，
+        # 同一天重复请求同一只股票时跳过指标/图表/摘要的全部重算
+        self._analysis_cache: Dict[Tuple, Dict] = {}
+        # 已连接数据源快照：(时间桶, ((名称, 数据源), ...))，约60秒失效
+        self._sources_snapshot: Optional[Tuple] = None
     
-    def analyze_stock(self, symbol: str, period: str = "daily", 
-                     days: int = 250, force_update: bool = False) -> Dict:
+    def analyze_stock(self, symbol: str, period: str = "daily",
+                     days: int = 250, force_update: bool = False,
+                     preloaded: Optional[pd.DataFrame] = None) -> Dict:
         """
         分析单只股票
         :param symbol: 股票代码
         :param period: 数据周期
         :param days: 分析天数
         :param force_update: 是否强制更新数据
+        :param preloaded: 预取的日线数据（批量分析时由批量查询提供）
         :return: 分析结果
         """
+        now = datetime.now()
+        cache_key = (symbol, period, days, now.strftime('%Y-%m-%d'))
+
+        # 缓存命中返回浅拷贝（force_update时绕过并在成功后覆盖旧条目）；
+        # 调用方（如analyze_watchlist）会往结果里补字段，直接返回
+        # 缓存对象会把这些字段永久写进缓存条目
+        if not force_update:
+            cached = self._analysis_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+
         result = {
             'symbol': symbol,
             'status': 'success',
@@ -42,12 +102,12 @@ class AnalysisEngine:
             'signals': None,
             'charts': None,
             'summary': None,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'timestamp': now.strftime('%Y-%m-%d %H:%M:%S')
         }
-        
+
         try:
             # 1. 获取股票数据
-            df = self._get_stock_data(symbol, period, days, force_update)
+            df = self._get_stock_data(symbol, period, days, force_update, preloaded)
             
             if df.empty:
                 result['status'] = 'error'
@@ -60,21 +120,28 @@ class AnalysisEngine:
             # 3. 获取技术信号
             signals = self.technical_indicators.get_latest_signals(df_with_indicators)
             
-            # 4. 生成图表
-            charts = self._generate_charts(df_with_indicators, symbol)
-            
+            # 4. 图表提交到后台线程池渲染，与摘要生成和数据库写入重叠
+            charts_future = self._get_chart_executor().submit(
+                self._generate_charts, df_with_indicators, symbol)
+
             # 5. 生成分析摘要
             summary = self._generate_summary(df_with_indicators, signals)
-            
+
             # 6. 保存结果到数据库 (非关键操作，失败不影响结果)
             try:
                 self._save_analysis_results(symbol, df_with_indicators)
                 self.logger.info(f"股票{symbol}的分析结果已保存到数据库")
             except Exception as save_error:
                 self.logger.warning(f"保存{symbol}分析结果失败（不影响主要功能）: {save_error}")
-            
+
+            # 图表在此汇合（_generate_charts内部已捕获单图异常）
+            charts = charts_future.result()
+
             result.update({
-                'data': df_with_indicators.tail(30).to_dict('records'),  # 返回最近30天数据
+                # 返回最近30天数据：to_json在C层一次性序列化整块数据，
+                # 比to_dict('records')逐行逐列装箱标量快得多
+                'data': json.loads(df_with_indicators.tail(30).to_json(
+                    orient='records', date_format='iso')),
                 'indicators': self._extract_latest_indicators(df_with_indicators),
                 'signals': signals,
                 'charts': charts,
@@ -82,40 +149,74 @@ class AnalysisEngine:
             })
             
             self.logger.info(f"股票{symbol}分析完成")
-            
+
+            # 只缓存成功结果；键含日期，隔天自动失效
+            if len(self._analysis_cache) >= 512:
+                self._analysis_cache.pop(next(iter(self._analysis_cache)))
+            self._analysis_cache[cache_key] = result
+
         except Exception as e:
             self.logger.error(f"股票{symbol}分析失败: {e}")
             result.update({
                 'status': 'error',
                 'message': str(e)
             })
-        
+
         return result
     
-    def batch_analyze_stocks(self, symbols: List[str], 
-                           period: str = "daily", days: int = 100) -> Dict:
+    def batch_analyze_stocks(self, symbols: List[str],
+                           period: str = "daily", days: int = 100,
+                           preloaded: Optional[Dict[str, pd.DataFrame]] = None) -> Dict:
         """
         批量分析股票
         :param symbols: 股票代码列表
         :param period: 数据周期
         :param days: 分析天数
+        :param preloaded: 批量预取的日线数据（symbol -> DataFrame）
         :return: 批量分析结果
         """
         results = {}
-        
-        for symbol in symbols:
-            try:
-                result = self.analyze_stock(symbol, period, days)
-                results[symbol] = result
-                self.logger.info(f"股票{symbol}分析完成")
-            except Exception as e:
-                self.logger.error(f"股票{symbol}分析失败: {e}")
-                results[symbol] = {
-                    'symbol': symbol,
-                    'status': 'error',
-                    'message': str(e)
-                }
-        
+        preloaded = preloaded or {}
+
+        # 单只股票直接在当前进程分析，避免起进程池的固定开销
+        if len(symbols) <= 1:
+            for symbol in symbols:
+                try:
+                    results[symbol] = self.analyze_stock(
+                        symbol, period, days, preloaded=preloaded.get(symbol)
+                    )
+                    self.logger.info(f"股票{symbol}分析完成")
+                except Exception as e:
+                    self.logger.error(f"股票{symbol}分析失败: {e}")
+                    results[symbol] = {
+                        'symbol': symbol,
+                        'status': 'error',
+                        'message': str(e)
+                    }
+            return results
+
+        # 各股票的分析相互独立（网络IO+CPU指标计算），用进程池并行
+        # 绕开GIL；引擎自身持有的数据库/数据源句柄不可pickle，由每个
+        # 子进程惰性构建自己的引擎单例（见_analyze_stock_worker）
+        max_workers = min(os.cpu_count() or 2, len(symbols))
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_analyze_stock_worker, symbol, period, days,
+                                   preloaded.get(symbol)): symbol
+                       for symbol in symbols}
+
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    results[symbol] = future.result()
+                    self.logger.info(f"股票{symbol}分析完成")
+                except Exception as e:
+                    self.logger.error(f"股票{symbol}分析失败: {e}")
+                    results[symbol] = {
+                        'symbol': symbol,
+                        'status': 'error',
+                        'message': str(e)
+                    }
+
         return results
     
     def analyze_watchlist(self) -> Dict:
@@ -132,12 +233,21 @@ class AnalysisEngine:
                 }
             
             symbols = [item['symbol'] for item in watchlist]
-            results = self.batch_analyze_stocks(symbols)
+
+            # 一次IN查询预取全部自选股的日线数据，替代每只股票
+            # 各查一次数据库的N+1模式
+            end_date = datetime.now().strftime('%Y%m%d')
+            start_date = (datetime.now() - timedelta(days=100)).strftime('%Y%m%d')
+            preloaded = self.db_manager.get_daily_prices_batch(symbols, start_date, end_date)
+
+            results = self.batch_analyze_stocks(symbols, preloaded=preloaded)
             
-            # 添加自选股的额外信息
+            # 添加自选股的额外信息（先拷贝再补字段，不改写可能
+            # 来自_analysis_cache的共享结果对象）
             for item in watchlist:
                 symbol = item['symbol']
                 if symbol in results:
+                    results[symbol] = dict(results[symbol])
                     results[symbol]['watchlist_info'] = {
                         'priority': item['priority'],
                         'notes': item['notes'],
@@ -158,51 +268,72 @@ class AnalysisEngine:
                 'message': str(e)
             }
     
-    def _get_stock_data(self, symbol: str, period: str, days: int, force_update: bool) -> pd.DataFrame:
+    def _connected_sources(self) -> Tuple:
+        """获取已连接数据源的快照（约60秒内复用）
+
+        批量分析时每只股票都要按优先级遍历数据源，这里把
+        可用性探测和is_connected检查的结果按分钟级时间桶缓存，
+        避免大批量任务对同一组数据源反复做连通性检查。
+        :return: ((名称, 数据源实例), ...) 按优先级排序
+        """
+        bucket = int(time.time() // 60)
+
+        if self._sources_snapshot is None or self._sources_snapshot[0] != bucket:
+            sources = []
+            for source_name in self.data_source_manager.get_available_sources():
+                source = self.data_source_manager.get_source_by_name(source_name)
+                if source is not None and source.is_connected:
+                    sources.append((source_name, source))
+            self._sources_snapshot = (bucket, tuple(sources))
+
+        return self._sources_snapshot[1]
+
+    def _get_stock_data(self, symbol: str, period: str, days: int, force_update: bool,
+                        preloaded: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """获取股票数据，支持多数据源备用"""
         end_date = datetime.now().strftime('%Y%m%d')
         start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
-        
-        # 先从数据库获取数据
+
+        # 先用批量预取的数据（覆盖率判定与数据库路径一致）
+        if not force_update and preloaded is not None:
+            if not preloaded.empty and len(preloaded) >= days * 0.8:
+                return preloaded
+
+        # 再从数据库获取数据
         if not force_update:
             df = self.db_manager.get_daily_prices(symbol, start_date.replace('-', ''), end_date.replace('-', ''))
             if not df.empty and len(df) >= days * 0.8:  # 如果数据覆盖率超过80%，使用数据库数据
                 return df
         
-        # 从数据源获取数据，尝试多个数据源
+        # 从数据源获取数据，尝试多个数据源（连通性检查结果约60秒内复用）
         df = pd.DataFrame()
-        available_sources = self.data_source_manager.get_available_sources()
-        
-        for source_name in available_sources:
+        connected_sources = self._connected_sources()
+
+        for source_name, source in connected_sources:
             try:
-                # 获取指定数据源
-                source = self.data_source_manager.get_source_by_name(source_name)
-                if source and source.is_connected:
-                    df = source.get_price_data(symbol, start_date, end_date, period)
-                    
-                    if not df.empty:
-                        self.logger.info(f"使用{source_name}数据源成功获取{symbol}数据")
-                        break
-                    else:
-                        self.logger.warning(f"{source_name}数据源无法获取{symbol}数据")
-                        
+                df = source.get_price_data(symbol, start_date, end_date, period)
+
+                if not df.empty:
+                    self.logger.info(f"使用{source_name}数据源成功获取{symbol}数据")
+                    break
+                else:
+                    self.logger.warning(f"{source_name}数据源无法获取{symbol}数据")
+
             except Exception as e:
                 self.logger.error(f"使用{source_name}数据源获取{symbol}数据失败: {e}")
                 continue
-        
+
         # 如果仍然无数据，尝试缩短时间范围
         if df.empty and days > 30:
             self.logger.warning(f"无法获取{symbol}长期数据，尝试获取短期数据")
             shorter_start = (datetime.now() - timedelta(days=30)).strftime('%Y%m%d')
-            
-            for source_name in available_sources:
+
+            for source_name, source in connected_sources:
                 try:
-                    source = self.data_source_manager.get_source_by_name(source_name)
-                    if source and source.is_connected:
-                        df = source.get_price_data(symbol, shorter_start, end_date, period)
-                        if not df.empty:
-                            self.logger.info(f"使用{source_name}数据源获取到{symbol}短期数据")
-                            break
+                    df = source.get_price_data(symbol, shorter_start, end_date, period)
+                    if not df.empty:
+                        self.logger.info(f"使用{source_name}数据源获取到{symbol}短期数据")
+                        break
                 except Exception as e:
                     continue
         
@@ -223,12 +354,9 @@ class AnalysisEngine:
         try:
             # 综合图表
             charts['comprehensive'] = self.chart_generator.create_comprehensive_chart(df, symbol)
-            
-            # 单独图表
-            charts['price'] = self.chart_generator.create_price_chart(df, symbol)
-            charts['macd'] = self.chart_generator.create_macd_chart(df, symbol)
-            charts['rsi'] = self.chart_generator.create_rsi_chart(df, symbol)
-            charts['kdj'] = self.chart_generator.create_kdj_chart(df, symbol)
+
+            # 单独图表：四张图共用一次渲染
+            charts.update(self.chart_generator.create_all_charts(df, symbol))
             
         except Exception as e:
             self.logger.error(f"生成图表失败: {e}")
@@ -240,35 +368,17 @@ class AnalysisEngine:
         if df.empty:
             return {}
         
-        latest = df.iloc[-1]
-        
-        indicators = {}
-        
-        # 移动平均线
-        for ma in ['ma5', 'ma10', 'ma20', 'ma60']:
-            if ma in latest and pd.notna(latest[ma]):
-                indicators[ma] = round(float(latest[ma]), 2)
-        
-        # MACD
-        for macd_col in ['macd', 'macd_signal', 'macd_histogram']:
-            if macd_col in latest and pd.notna(latest[macd_col]):
-                indicators[macd_col] = round(float(latest[macd_col]), 4)
-        
-        # RSI
-        if 'rsi' in latest and pd.notna(latest['rsi']):
-            indicators['rsi'] = round(float(latest['rsi']), 2)
-        
-        # KDJ
-        for kdj_col in ['kdj_k', 'kdj_d', 'kdj_j']:
-            if kdj_col in latest and pd.notna(latest[kdj_col]):
-                indicators[kdj_col] = round(float(latest[kdj_col]), 2)
-        
-        # 布林带
-        for boll_col in ['boll_upper', 'boll_middle', 'boll_lower']:
-            if boll_col in latest and pd.notna(latest[boll_col]):
-                indicators[boll_col] = round(float(latest[boll_col]), 2)
-        
-        return indicators
+        # 一次切出末行的全部指标列并转成数组，NaN过滤和取值
+        # 都在数组层完成，避免逐列的Series标量访问
+        present = [col for col in self._INDICATOR_PRECISION if col in df.columns]
+        if not present:
+            return {}
+
+        values = df[present].iloc[-1].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+
+        return {col: round(float(val), self._INDICATOR_PRECISION[col])
+                for col, val, ok in zip(present, values, valid) if ok}
     
     def _generate_summary(self, df: pd.DataFrame, signals: Dict) -> Dict:
         """生成分析摘要"""
@@ -296,33 +406,33 @@ class AnalysisEngine:
     
     def _analyze_technical_status(self, df: pd.DataFrame) -> Dict:
         """分析技术状态"""
+        # 所需标量一次性取出为局部变量，省掉重复的`in latest`+pd.notna
         latest = df.iloc[-1]
+        get = latest.get
+        ma5, ma20 = get('ma5'), get('ma20')
+        rsi_val = get('rsi')
+        macd_val, macd_sig = get('macd'), get('macd_signal')
+
         status = {}
-        
+
         # 趋势分析
-        if 'ma5' in latest and 'ma20' in latest and pd.notna(latest['ma5']) and pd.notna(latest['ma20']):
-            if latest['ma5'] > latest['ma20']:
-                status['trend'] = '上升趋势'
-            else:
-                status['trend'] = '下降趋势'
-        
+        if ma5 is not None and ma20 is not None and pd.notna(ma5) and pd.notna(ma20):
+            status['trend'] = '上升趋势' if ma5 > ma20 else '下降趋势'
+
         # RSI状态
-        if 'rsi' in latest and pd.notna(latest['rsi']):
-            rsi_val = latest['rsi']
+        if rsi_val is not None and pd.notna(rsi_val):
             if rsi_val > 70:
                 status['rsi_status'] = '超买'
             elif rsi_val < 30:
                 status['rsi_status'] = '超卖'
             else:
                 status['rsi_status'] = '正常'
-        
+
         # MACD状态
-        if 'macd' in latest and 'macd_signal' in latest and pd.notna(latest['macd']) and pd.notna(latest['macd_signal']):
-            if latest['macd'] > latest['macd_signal']:
-                status['macd_status'] = '多头'
-            else:
-                status['macd_status'] = '空头'
-        
+        if (macd_val is not None and macd_sig is not None
+                and pd.notna(macd_val) and pd.notna(macd_sig)):
+            status['macd_status'] = '多头' if macd_val > macd_sig else '空头'
+
         return status
     
     def _calculate_risk_level(self, df: pd.DataFrame) -> str:
@@ -330,9 +440,12 @@ class AnalysisEngine:
         if len(df) < 20:
             return '数据不足'
         
-        # 基于价格波动率计算风险
-        price_volatility = df['close'].pct_change().std() * 100
-        
+        # 基于价格波动率计算风险：只看最近60日收益率，
+        # 在NumPy数组上单遍算标准差（ddof=1与Series.std一致）
+        close = df['close'].to_numpy(dtype=np.float64)[-61:]
+        returns = np.diff(close) / close[:-1]
+        price_volatility = np.nanstd(returns, ddof=1) * 100
+
         if price_volatility > 5:
             return '高风险'
         elif price_volatility > 3:
@@ -345,16 +458,12 @@ class AnalysisEngine:
         if df.empty:
             return '数据不足，无法给出建议'
         
-        positive_signals = 0
-        negative_signals = 0
-        
-        # 分析信号
-        for signal in signals.keys():
-            if any(keyword in signal for keyword in ['golden_cross', 'oversold', 'breakthrough_lower']):
-                positive_signals += 1
-            elif any(keyword in signal for keyword in ['death_cross', 'overbought', 'breakthrough_upper']):
-                negative_signals += 1
-        
+        # 分析信号：与多/空信号集合做一次C层哈希交集，
+        # 替代每个信号的多轮子串扫描
+        positive_signals = len(signals.keys() & self._POSITIVE_SIGNALS)
+        negative_signals = len(signals.keys() & self._NEGATIVE_SIGNALS)
+
+
         # 生成建议
         if positive_signals > negative_signals:
             return '建议关注，可能存在买入机会'
@@ -379,8 +488,14 @@ class AnalysisEngine:
             
             if len(available_columns) > 0:  # 至少要有一个指标列
                 indicators_df = df[available_columns].copy()
+
+                # 指标只做展示用（2~4位小数），降为float32减半写库数据量
+                float_cols = indicators_df.select_dtypes('float64').columns
+                if len(float_cols) > 0:
+                    indicators_df[float_cols] = indicators_df[float_cols].astype('float32')
+
                 indicators_df['symbol'] = symbol
-                
+
                 self.db_manager.save_technical_indicators(indicators_df)
                 
         except Exception as e:
@@ -412,20 +527,32 @@ class AnalysisEngine:
                 # 默认按涨幅排序
                 sorted_stocks = stock_list.sort_values('pct_change', ascending=False)
             
-            # 返回前N只股票
-            result = []
-            for _, row in sorted_stocks.head(limit).iterrows():
-                result.append({
-                    'symbol': row['symbol'],
-                    'name': row['name'],
-                    'price': round(row['price'], 2) if pd.notna(row['price']) else 0,
-                    'pct_change': round(row['pct_change'], 2) if pd.notna(row['pct_change']) else 0,
-                    'volume': int(row['volume']) if pd.notna(row['volume']) else 0,
-                    'turnover_rate': round(row['turnover_rate'], 2) if pd.notna(row['turnover_rate']) else 0
-                })
-            
-            return result
+            # 返回前N只股票（整列round/fillna后一次性转dict，避免iterrows逐行循环）
+            top = sorted_stocks.head(limit)[['symbol', 'name', 'price', 'pct_change',
+                                             'volume', 'turnover_rate']].copy()
+            round_cols = ['price', 'pct_change', 'turnover_rate']
+            top[round_cols] = top[round_cols].round(2).fillna(0)
+            top['volume'] = top['volume'].fillna(0).astype('int64')
+
+            return top.to_dict('records')
             
         except Exception as e:
             self.logger.error(f"获取股票排行榜失败: {e}")
-            return []
\ No newline at end of file
+            return []
+
+
+# 进程池工作进程内缓存的引擎实例，同一子进程的多只股票共用
+_worker_engine: Optional[AnalysisEngine] = None
+
+
+def _analyze_stock_worker(symbol: str, period: str, days: int,
+                          preloaded: Optional[pd.DataFrame] = None) -> Dict:
+    """分析单只股票的进程池工作函数
+
+    必须位于模块顶层才能被pickle；每个子进程首次执行时构建
+    自己的引擎（带独立的数据库连接和数据源管理器）并复用。
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = AnalysisEngine()
+    return _worker_engine.analyze_stock(symbol, period, days, preloaded=preloaded)
\ No newline at end of file
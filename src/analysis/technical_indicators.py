@@ -8,10 +8,162 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional
 import logging
 
+# numba为可选加速依赖，未安装时自动回退到pandas实现
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# 指标参数取自config的冻结dataclass，模块加载时解析一次
+try:
+    from config import TECHNICAL_INDICATORS as _indicator_config
+    _MA_PERIODS = tuple(_indicator_config.ma)
+    _MACD_PARAMS = (_indicator_config.macd.fast, _indicator_config.macd.slow,
+                    _indicator_config.macd.signal)
+    _RSI_PERIOD = _indicator_config.rsi.period
+    _KDJ_PARAMS = (_indicator_config.kdj.k_period, _indicator_config.kdj.d_period,
+                   _indicator_config.kdj.j_period)
+    _BOLL_PARAMS = (_indicator_config.boll.period, _indicator_config.boll.std)
+except ImportError:
+    _MA_PERIODS = (5, 10, 20, 60)
+    _MACD_PARAMS = (12, 26, 9)
+    _RSI_PERIOD = 14
+    _KDJ_PARAMS = (9, 3, 3)
+    _BOLL_PARAMS = (20, 2.0)
+
+
+def _rolling_mean_cumsum(values: np.ndarray, period: int) -> np.ndarray:
+    """基于累积和的滚动均值，O(N)且与窗口大小无关
+
+    与rolling(period).mean()语义一致：含NaN的窗口输出NaN，
+    窗口滑过缺口后恢复正常值。NaN先置零再累积，另用一份
+    缺失计数的累积和标记被污染的窗口，缺口不会向后传播。
+    """
+    n = len(values)
+    result = np.full(n, np.nan)
+    if n < period:
+        return result
+
+    nan_mask = np.isnan(values)
+    if not nan_mask.any():
+        csum = np.cumsum(values)
+        result[period - 1:] = (csum[period - 1:] -
+                               np.concatenate(([0.0], csum[:-period]))) / period
+        return result
+
+    csum = np.cumsum(np.where(nan_mask, 0.0, values))
+    window_sum = csum[period - 1:] - np.concatenate(([0.0], csum[:-period]))
+    ncnt = np.cumsum(nan_mask)
+    window_nan = ncnt[period - 1:] - np.concatenate(([0], ncnt[:-period]))
+    result[period - 1:] = np.where(window_nan > 0, np.nan, window_sum / period)
+    return result
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _macd_kernel(values, fast, slow, signal):
+        """单遍融合计算快线/慢线EMA和信号线（等价于ewm(span, adjust=True)）
+
+        NaN观测只衰减现有权重、不引入新项（对应ewm默认的
+        ignore_na=False），缺口处输出沿用上一个有效EMA值，
+        不会把一个NaN传播到其后的全部MACD。
+        """
+        n = values.shape[0]
+        macd = np.empty(n)
+        sig = np.empty(n)
+        a_fast = 2.0 / (fast + 1.0)
+        a_slow = 2.0 / (slow + 1.0)
+        a_sig = 2.0 / (signal + 1.0)
+        num_f = den_f = num_s = den_s = num_g = den_g = 0.0
+        for i in range(n):
+            x = values[i]
+            if np.isnan(x):
+                num_f *= 1.0 - a_fast
+                den_f *= 1.0 - a_fast
+                num_s *= 1.0 - a_slow
+                den_s *= 1.0 - a_slow
+            else:
+                num_f = x + (1.0 - a_fast) * num_f
+                den_f = 1.0 + (1.0 - a_fast) * den_f
+                num_s = x + (1.0 - a_slow) * num_s
+                den_s = 1.0 + (1.0 - a_slow) * den_s
+            # 序列开头连续NaN时den为0，输出NaN
+            m = num_f / den_f - num_s / den_s if den_f > 0.0 else np.nan
+            macd[i] = m
+            if np.isnan(m):
+                num_g *= 1.0 - a_sig
+                den_g *= 1.0 - a_sig
+            else:
+                num_g = m + (1.0 - a_sig) * num_g
+                den_g = 1.0 + (1.0 - a_sig) * den_g
+            sig[i] = num_g / den_g if den_g > 0.0 else np.nan
+        return macd, sig
+else:
+    _macd_kernel = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _kdj_smooth(rsv):
+        """单遍融合计算K值和D值的递推平滑
+
+        K/D两个递推在一次循环内完成，NaN位置原样传递且不影响
+        平滑状态，与纯Python实现语义一致（初始值均为50）。
+        """
+        n = rsv.shape[0]
+        k = np.empty(n)
+        d = np.empty(n)
+        k_prev = 50.0
+        d_prev = 50.0
+        for i in range(n):
+            x = rsv[i]
+            if np.isnan(x):
+                k[i] = np.nan
+                d[i] = np.nan
+            else:
+                k_prev = (2.0 / 3.0) * k_prev + (1.0 / 3.0) * x
+                k[i] = k_prev
+                d_prev = (2.0 / 3.0) * d_prev + (1.0 / 3.0) * k_prev
+                d[i] = d_prev
+        return k, d
+else:
+    _kdj_smooth = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _obv_loop(price_change, volume):
+        """有符号成交量的累积求和（OBV主循环）
+
+        用np.sign做无分支累加，NaN位置输出NaN但不中断累积状态，
+        与纯Python实现语义一致（首日无涨跌方向，记为NaN）。
+        """
+        n = price_change.shape[0]
+        out = np.empty(n)
+        acc = 0.0
+        if n > 0:
+            out[0] = np.nan
+        for i in range(1, n):
+            d = price_change[i]
+            v = volume[i]
+            if np.isnan(d) or np.isnan(v):
+                out[i] = np.nan
+            else:
+                acc += np.sign(d) * v
+                out[i] = acc
+        return out
+else:
+    _obv_loop = None
+
 
 class TechnicalIndicators:
     """技术指标计算类"""
-    
+
+    # get_latest_signals读取的列（固定顺序，缺失列按NaN处理）
+    _SIGNAL_COLS = ['ma5', 'ma20', 'macd', 'macd_signal',
+                    'kdj_k', 'kdj_d', 'rsi', 'close',
+                    'boll_upper', 'boll_lower']
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
@@ -22,13 +174,13 @@ class TechnicalIndicators:
         :param periods: 计算周期列表
         :return: 各周期移动平均线字典
         """
+        values = prices.to_numpy(dtype=np.float64)
         ma_dict = {}
         for period in periods:
-            if len(prices) >= period:
-                ma_dict[f'ma{period}'] = prices.rolling(window=period).mean()
-            else:
-                ma_dict[f'ma{period}'] = pd.Series([np.nan] * len(prices), index=prices.index)
-        
+            ma_dict[f'ma{period}'] = pd.Series(
+                _rolling_mean_cumsum(values, period), index=prices.index
+            )
+
         return ma_dict
     
     def calculate_ema(self, prices: pd.Series, periods: List[int] = [12, 26]) -> Dict[str, pd.Series]:
@@ -47,13 +199,17 @@ class TechnicalIndicators:
         
         return ema_dict
     
-    def calculate_macd(self, prices: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, pd.Series]:
+    def calculate_macd(self, prices: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9,
+                       ema_fast: Optional[pd.Series] = None,
+                       ema_slow: Optional[pd.Series] = None) -> Dict[str, pd.Series]:
         """
         计算MACD指标
         :param prices: 价格序列
         :param fast: 快线周期
         :param slow: 慢线周期
         :param signal: 信号线周期
+        :param ema_fast: 已算好的快线EMA（与calculate_ema共享，省去重算）
+        :param ema_slow: 已算好的慢线EMA
         :return: MACD指标字典
         """
         if len(prices) < slow:
@@ -63,16 +219,26 @@ class TechnicalIndicators:
                 'macd_histogram': pd.Series([np.nan] * len(prices), index=prices.index)
             }
         
-        # 计算快慢线EMA
-        ema_fast = prices.ewm(span=fast).mean()
-        ema_slow = prices.ewm(span=slow).mean()
-        
-        # 计算MACD线
-        macd_line = ema_fast - ema_slow
-        
-        # 计算信号线（MACD的EMA）
-        signal_line = macd_line.ewm(span=signal).mean()
-        
+        if _macd_kernel is not None and ema_fast is None and ema_slow is None:
+            # 单遍融合内核：快线/慢线/信号线三个递推在一次循环内完成
+            macd_values, signal_values = _macd_kernel(
+                prices.to_numpy(dtype=np.float64), fast, slow, signal
+            )
+            macd_line = pd.Series(macd_values, index=prices.index)
+            signal_line = pd.Series(signal_values, index=prices.index)
+        else:
+            # 计算快慢线EMA（调用方已算好时直接复用）
+            if ema_fast is None:
+                ema_fast = prices.ewm(span=fast).mean()
+            if ema_slow is None:
+                ema_slow = prices.ewm(span=slow).mean()
+
+            # 计算MACD线
+            macd_line = ema_fast - ema_slow
+
+            # 计算信号线（MACD的EMA）
+            signal_line = macd_line.ewm(span=signal).mean()
+
         # 计算MACD柱状图
         histogram = macd_line - signal_line
         
@@ -94,19 +260,18 @@ class TechnicalIndicators:
         
         # 计算价格变化
         delta = prices.diff()
-        
+
         # 分离上涨和下跌
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-        
-        # 计算平均收益和平均损失
-        avg_gain = gain.rolling(window=period).mean()
-        avg_loss = loss.rolling(window=period).mean()
-        
-        # 计算RS和RSI
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
+        gain = delta.clip(lower=0)
+        loss = (-delta).clip(lower=0)
+
+        # Wilder平滑（α=1/period的指数均值），单遍C实现
+        avg_gain = gain.ewm(alpha=1.0 / period, adjust=False, min_periods=period).mean()
+        avg_loss = loss.ewm(alpha=1.0 / period, adjust=False, min_periods=period).mean()
+
+        # 计算RSI（全涨无跌时avg_loss为0，置NaN避免除零）
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss.replace(0, np.nan))
+
         return rsi
     
     def calculate_kdj(self, high: pd.Series, low: pd.Series, close: pd.Series, 
@@ -130,34 +295,40 @@ class TechnicalIndicators:
         highest_high = high.rolling(window=k_period).max()
         
         rsv = (close - lowest_low) / (highest_high - lowest_low) * 100
-        
-        # 计算K值（K值是RSV的移动平均）
-        k_values = []
-        k_prev = 50  # K值初始值
-        
-        for rsv_val in rsv:
-            if pd.isna(rsv_val):
-                k_values.append(np.nan)
-            else:
-                k_current = (2/3) * k_prev + (1/3) * rsv_val
-                k_values.append(k_current)
-                k_prev = k_current
-        
-        k_series = pd.Series(k_values, index=close.index)
-        
-        # 计算D值（K值的移动平均）
-        d_values = []
-        d_prev = 50  # D值初始值
-        
-        for k_val in k_series:
-            if pd.isna(k_val):
-                d_values.append(np.nan)
-            else:
-                d_current = (2/3) * d_prev + (1/3) * k_val
-                d_values.append(d_current)
-                d_prev = d_current
-        
-        d_series = pd.Series(d_values, index=close.index)
+
+        if _kdj_smooth is not None:
+            # JIT内核：K/D递推在一次C速度循环里完成
+            k_arr, d_arr = _kdj_smooth(rsv.to_numpy(dtype=np.float64))
+            k_series = pd.Series(k_arr, index=close.index)
+            d_series = pd.Series(d_arr, index=close.index)
+        else:
+            # 计算K值（K值是RSV的移动平均）
+            k_values = []
+            k_prev = 50  # K值初始值
+
+            for rsv_val in rsv:
+                if pd.isna(rsv_val):
+                    k_values.append(np.nan)
+                else:
+                    k_current = (2/3) * k_prev + (1/3) * rsv_val
+                    k_values.append(k_current)
+                    k_prev = k_current
+
+            k_series = pd.Series(k_values, index=close.index)
+
+            # 计算D值（K值的移动平均）
+            d_values = []
+            d_prev = 50  # D值初始值
+
+            for k_val in k_series:
+                if pd.isna(k_val):
+                    d_values.append(np.nan)
+                else:
+                    d_current = (2/3) * d_prev + (1/3) * k_val
+                    d_values.append(d_current)
+                    d_prev = d_current
+
+            d_series = pd.Series(d_values, index=close.index)
         
         # 计算J值
         j_series = 3 * k_series - 2 * d_series
@@ -207,13 +378,13 @@ class TechnicalIndicators:
         :param periods: 计算周期列表
         :return: 成交量均线字典
         """
+        values = volume.to_numpy(dtype=np.float64)
         vol_ma_dict = {}
         for period in periods:
-            if len(volume) >= period:
-                vol_ma_dict[f'vol_ma{period}'] = volume.rolling(window=period).mean()
-            else:
-                vol_ma_dict[f'vol_ma{period}'] = pd.Series([np.nan] * len(volume), index=volume.index)
-        
+            vol_ma_dict[f'vol_ma{period}'] = pd.Series(
+                _rolling_mean_cumsum(values, period), index=volume.index
+            )
+
         return vol_ma_dict
     
     def calculate_atr(self, high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
@@ -228,17 +399,22 @@ class TechnicalIndicators:
         if len(close) < 2:
             return pd.Series([np.nan] * len(close), index=close.index)
         
-        # 计算真实范围TR
-        prev_close = close.shift(1)
-        tr1 = high - low
-        tr2 = abs(high - prev_close)
-        tr3 = abs(low - prev_close)
-        
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        
-        # 计算ATR（TR的移动平均）
-        atr = tr.rolling(window=period).mean()
-        
+        # 计算真实范围TR（纯NumPy单遍取最大，不构造临时DataFrame）
+        h = high.to_numpy(dtype=np.float64)
+        l = low.to_numpy(dtype=np.float64)
+        c = close.to_numpy(dtype=np.float64)
+
+        pc = np.empty_like(c)
+        pc[0] = np.nan
+        pc[1:] = c[:-1]
+
+        tr = np.maximum(np.maximum(h - l, np.abs(h - pc)), np.abs(l - pc))
+
+        # 计算ATR（TR的Wilder平滑，α=1/period的单遍指数均值）
+        atr = pd.Series(tr, index=close.index).ewm(
+            alpha=1.0 / period, adjust=False, min_periods=period
+        ).mean()
+
         return atr
     
     def calculate_obv(self, close: pd.Series, volume: pd.Series) -> pd.Series:
@@ -253,11 +429,17 @@ class TechnicalIndicators:
         
         # 计算价格变化方向
         price_change = close.diff()
-        
+
+        if _obv_loop is not None:
+            # JIT内核：有符号成交量在一次C速度循环里累加
+            obv_arr = _obv_loop(price_change.to_numpy(dtype=np.float64),
+                                volume.to_numpy(dtype=np.float64))
+            return pd.Series(obv_arr, index=close.index)
+
         # 根据价格变化确定成交量的正负
         obv_values = []
         obv_current = 0
-        
+
         for i, (price_diff, vol) in enumerate(zip(price_change, volume)):
             if i == 0 or pd.isna(price_diff) or pd.isna(vol):
                 obv_values.append(np.nan)
@@ -268,7 +450,7 @@ class TechnicalIndicators:
                     obv_current -= vol
                 # 价格不变时，OBV不变
                 obv_values.append(obv_current)
-        
+
         return pd.Series(obv_values, index=close.index)
     
     def calculate_all_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -277,49 +459,56 @@ class TechnicalIndicators:
         :param df: 包含OHLCV数据的DataFrame
         :return: 包含所有技术指标的DataFrame
         """
-        result_df = df.copy()
-        
         try:
+            # 各指标结果先汇入一个列字典，最后assign一次性合并，
+            # 避免逐列插入反复触发DataFrame块整理与拷贝
+            # 输入列先统一转成连续float64数组再包回Series：后续各指标的
+            # to_numpy(dtype=float64)/ewm直接取零拷贝视图，不再每次做
+            # dtype检查和非连续块到连续缓冲的拷贝
+            def _as_f64(s: pd.Series) -> pd.Series:
+                return pd.Series(
+                    np.ascontiguousarray(s.to_numpy(dtype=np.float64)),
+                    index=s.index, name=s.name)
+
+            close = _as_f64(df['close'])
+            high = _as_f64(df['high'])
+            low = _as_f64(df['low'])
+            cols = {}
+
             # 移动平均线
-            ma_indicators = self.calculate_ma(df['close'])
-            for key, value in ma_indicators.items():
-                result_df[key] = value
-            
+            cols.update(self.calculate_ma(close, periods=list(_MA_PERIODS)))
+
             # MACD
-            macd_indicators = self.calculate_macd(df['close'])
-            for key, value in macd_indicators.items():
-                result_df[key] = value
-            
+            cols.update(self.calculate_macd(close, *_MACD_PARAMS))
+
             # RSI
-            result_df['rsi'] = self.calculate_rsi(df['close'])
-            
+            cols['rsi'] = self.calculate_rsi(close, period=_RSI_PERIOD)
+
             # KDJ
-            kdj_indicators = self.calculate_kdj(df['high'], df['low'], df['close'])
-            for key, value in kdj_indicators.items():
-                result_df[key] = value
-            
+            cols.update(self.calculate_kdj(high, low, close, *_KDJ_PARAMS))
+
             # 布林带
-            boll_indicators = self.calculate_bollinger_bands(df['close'])
-            for key, value in boll_indicators.items():
-                result_df[key] = value
-            
+            cols.update(self.calculate_bollinger_bands(close, *_BOLL_PARAMS))
+
             # 成交量指标
             if 'volume' in df.columns:
-                vol_ma_indicators = self.calculate_volume_ma(df['volume'])
-                for key, value in vol_ma_indicators.items():
-                    result_df[key] = value
-                
+                volume = _as_f64(df['volume'])
+                cols.update(self.calculate_volume_ma(volume))
+
                 # OBV
-                result_df['obv'] = self.calculate_obv(df['close'], df['volume'])
-            
+                cols['obv'] = self.calculate_obv(close, volume)
+
             # ATR
-            result_df['atr'] = self.calculate_atr(df['high'], df['low'], df['close'])
-            
+            cols['atr'] = self.calculate_atr(high, low, close)
+
+            result_df = df.assign(**cols)
             self.logger.info("技术指标计算完成")
-            
+
         except Exception as e:
             self.logger.error(f"技术指标计算失败: {e}")
-        
+            # 浅拷贝即可：只需返回独立的frame对象，无需复制OHLCV数据块
+            result_df = df.copy(deep=False)
+
         return result_df
     
     def get_latest_signals(self, df: pd.DataFrame) -> Dict:
@@ -330,52 +519,56 @@ class TechnicalIndicators:
         """
         if df.empty or len(df) < 2:
             return {}
-        
-        latest = df.iloc[-1]
-        prev = df.iloc[-2]
-        
+
         signals = {}
-        
+
         try:
+            # 末两行一次性切出并转成2xK浮点矩阵，后续全部按位置
+            # 索引取标量，省掉逐列的Series访问和pd.isna调用；
+            # 缺失列经reindex补为NaN，相应信号自然跳过
+            tail2 = df.tail(2).reindex(columns=self._SIGNAL_COLS)
+            arr = tail2.to_numpy(dtype=np.float64)
+            (p_ma5, p_ma20, p_macd, p_macd_sig,
+             p_k, p_d, _, _, _, _) = arr[0]
+            (ma5, ma20, macd, macd_sig,
+             k, d, rsi, close, boll_up, boll_low) = arr[1]
+
             # MA信号
-            if not pd.isna(latest.get('ma5')) and not pd.isna(latest.get('ma20')):
-                if latest['ma5'] > latest['ma20'] and prev['ma5'] <= prev['ma20']:
+            if not np.isnan(ma5) and not np.isnan(ma20):
+                if ma5 > ma20 and p_ma5 <= p_ma20:
                     signals['ma_golden_cross'] = True
-                elif latest['ma5'] < latest['ma20'] and prev['ma5'] >= prev['ma20']:
+                elif ma5 < ma20 and p_ma5 >= p_ma20:
                     signals['ma_death_cross'] = True
-            
+
             # MACD信号
-            if not pd.isna(latest.get('macd')) and not pd.isna(latest.get('macd_signal')):
-                if latest['macd'] > latest['macd_signal'] and prev['macd'] <= prev['macd_signal']:
+            if not np.isnan(macd) and not np.isnan(macd_sig):
+                if macd > macd_sig and p_macd <= p_macd_sig:
                     signals['macd_golden_cross'] = True
-                elif latest['macd'] < latest['macd_signal'] and prev['macd'] >= prev['macd_signal']:
+                elif macd < macd_sig and p_macd >= p_macd_sig:
                     signals['macd_death_cross'] = True
-            
+
             # RSI信号
-            if not pd.isna(latest.get('rsi')):
-                if latest['rsi'] > 70:
+            if not np.isnan(rsi):
+                if rsi > 70:
                     signals['rsi_overbought'] = True
-                elif latest['rsi'] < 30:
+                elif rsi < 30:
                     signals['rsi_oversold'] = True
-            
+
             # KDJ信号
-            if not pd.isna(latest.get('kdj_k')) and not pd.isna(latest.get('kdj_d')):
-                if latest['kdj_k'] > latest['kdj_d'] and prev['kdj_k'] <= prev['kdj_d']:
+            if not np.isnan(k) and not np.isnan(d):
+                if k > d and p_k <= p_d:
                     signals['kdj_golden_cross'] = True
-                elif latest['kdj_k'] < latest['kdj_d'] and prev['kdj_k'] >= prev['kdj_d']:
+                elif k < d and p_k >= p_d:
                     signals['kdj_death_cross'] = True
-            
+
             # 布林带信号
-            if (not pd.isna(latest.get('close')) and 
-                not pd.isna(latest.get('boll_upper')) and 
-                not pd.isna(latest.get('boll_lower'))):
-                
-                if latest['close'] > latest['boll_upper']:
+            if not (np.isnan(close) or np.isnan(boll_up) or np.isnan(boll_low)):
+                if close > boll_up:
                     signals['boll_breakthrough_upper'] = True
-                elif latest['close'] < latest['boll_lower']:
+                elif close < boll_low:
                     signals['boll_breakthrough_lower'] = True
-        
+
         except Exception as e:
             self.logger.error(f"获取技术信号失败: {e}")
-        
+
         return signals
\ No newline at end of file
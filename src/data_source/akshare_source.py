@@ -7,10 +7,47 @@ import akshare as ak
 import pandas as pd
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-import time
 import logging
 
 from .base import BaseDataSource
+from .cache import cached
+
+# 中文->英文列名映射（模块级常量，避免每次调用重建dict；
+# 重命名只改列Index元数据，不触发rename(copy=True)的数据块拷贝）
+_SPOT_COLMAP = {
+    '代码': 'symbol',
+    '名称': 'name',
+    '最新价': 'price',
+    '涨跌幅': 'pct_change',
+    '涨跌额': 'change',
+    '成交量': 'volume',
+    '成交额': 'amount',
+    '振幅': 'amplitude',
+    '最高': 'high',
+    '最低': 'low',
+    '今开': 'open',
+    '昨收': 'pre_close',
+    '量比': 'volume_ratio',
+    '换手率': 'turnover_rate',
+    '市盈率-动态': 'pe_ttm',
+    '市净率': 'pb'
+}
+
+_PERIOD_MAP = {'daily': 'daily', 'weekly': 'weekly', 'monthly': 'monthly'}
+
+_HIST_COLMAP = {
+    '日期': 'date',
+    '开盘': 'open',
+    '收盘': 'close',
+    '最高': 'high',
+    '最低': 'low',
+    '成交量': 'volume',
+    '成交额': 'amount',
+    '振幅': 'amplitude',
+    '涨跌幅': 'pct_change',
+    '涨跌额': 'change',
+    '换手率': 'turnover_rate'
+}
 
 
 class AKShareDataSource(BaseDataSource):
@@ -19,10 +56,41 @@ class AKShareDataSource(BaseDataSource):
     def __init__(self):
         super().__init__("akshare")
         self.logger = logging.getLogger(__name__)
-        self._stock_list_cache = None
-        self._cache_time = None
-        self._cache_expire = 3600  # 缓存1小时
-    
+        # symbol -> 行号索引：(股票列表frame引用, 字典)，列表刷新后
+        # 按frame身份失效重建；持有frame引用防止其被回收后id被复用
+        self._stock_list_index = None
+        # 以symbol为索引的股票列表视图：(frame引用, DataFrame)，同样按身份失效
+        self._stock_list_indexed = None
+
+    def _lookup_stock_row(self, stock_list: pd.DataFrame, symbol: str):
+        """在股票列表中按代码做O(1)哈希查找
+
+        单股查询用布尔掩码要线性扫描约5000行，刷新一次watchlist
+        就是几十万次比较；这里对缓存返回的同一个frame只建一次
+        symbol->行号字典，之后都是字典访问。
+        :return: 命中的行（Series），未命中返回None
+        """
+        index = self._stock_list_index
+        if index is None or index[0] is not stock_list:
+            index = (stock_list,
+                     {sym: i for i, sym in enumerate(stock_list['symbol'].to_numpy())})
+            self._stock_list_index = index
+
+        pos = index[1].get(symbol)
+        return stock_list.iloc[pos] if pos is not None else None
+
+    def _indexed_stock_list(self, stock_list: pd.DataFrame) -> pd.DataFrame:
+        """获取以symbol为索引的股票列表视图（随缓存frame一同失效）
+
+        reindex按哈希索引直接gather出K行，替代isin布尔掩码对
+        全部约5000行的扫描和随之而来的整frame拷贝。
+        """
+        indexed = self._stock_list_indexed
+        if indexed is None or indexed[0] is not stock_list:
+            indexed = (stock_list, stock_list.set_index('symbol', drop=False))
+            self._stock_list_indexed = indexed
+        return indexed[1]
+
     def connect(self) -> bool:
         """连接AKShare"""
         try:
@@ -33,67 +101,41 @@ class AKShareDataSource(BaseDataSource):
                 self.logger.info("AKShare连接成功")
                 return True
         except Exception as e:
-            self.logger.error(f"AKShare连接失败: {e}")
+            self.logger.error("AKShare连接失败: %s", e)
             self.is_connected = False
         return False
     
+    @cached(ttl=3600)
     def get_stock_list(self) -> pd.DataFrame:
-        """获取A股股票列表"""
+        """获取A股股票列表（缓存1小时）"""
         try:
-            # 检查缓存
-            if (self._stock_list_cache is not None and 
-                self._cache_time is not None and 
-                time.time() - self._cache_time < self._cache_expire):
-                return self._stock_list_cache
-            
             # 获取A股实时行情数据
             df = ak.stock_zh_a_spot_em()
             
             if df is not None and not df.empty:
-                # 标准化列名
-                df = df.rename(columns={
-                    '代码': 'symbol',
-                    '名称': 'name',
-                    '最新价': 'price',
-                    '涨跌幅': 'pct_change',
-                    '涨跌额': 'change',
-                    '成交量': 'volume',
-                    '成交额': 'amount',
-                    '振幅': 'amplitude',
-                    '最高': 'high',
-                    '最低': 'low',
-                    '今开': 'open',
-                    '昨收': 'pre_close',
-                    '量比': 'volume_ratio',
-                    '换手率': 'turnover_rate',
-                    '市盈率-动态': 'pe_ttm',
-                    '市净率': 'pb'
-                })
+                # 标准化列名（只替换列Index，不拷贝数据）
+                df.columns = [_SPOT_COLMAP.get(c, c) for c in df.columns]
                 
-                # 缓存结果
-                self._stock_list_cache = df
-                self._cache_time = time.time()
-                
-                self.logger.info(f"获取股票列表成功，共{len(df)}只股票")
+                self.logger.info("获取股票列表成功，共%s只股票", len(df))
                 return df
         
         except Exception as e:
-            self.logger.error(f"获取股票列表失败: {e}")
+            self.logger.error("获取股票列表失败: %s", e)
         
         return pd.DataFrame()
     
+    @cached(ttl=30)
     def get_stock_info(self, symbol: str) -> Dict:
-        """获取股票基本信息"""
+        """获取股票基本信息（缓存30秒）"""
         try:
             # 获取股票基本信息
             info = {}
             
-            # 从股票列表中获取基本信息
+            # 从股票列表中获取基本信息（按代码哈希查找，不做整列扫描）
             stock_list = self.get_stock_list()
             if not stock_list.empty:
-                stock_data = stock_list[stock_list['symbol'] == symbol]
-                if not stock_data.empty:
-                    stock_row = stock_data.iloc[0]
+                stock_row = self._lookup_stock_row(stock_list, symbol)
+                if stock_row is not None:
                     info = {
                         'symbol': symbol,
                         'name': stock_row.get('name', ''),
@@ -110,26 +152,27 @@ class AKShareDataSource(BaseDataSource):
                 # 获取股票基本面信息
                 fundamental = ak.stock_individual_info_em(symbol=symbol)
                 if fundamental is not None and not fundamental.empty:
-                    # 将fundamental数据添加到info中
-                    for _, row in fundamental.iterrows():
-                        key = row.get('item', '')
-                        value = row.get('value', '')
-                        if key == '总市值':
-                            info['total_market_cap'] = value
-                        elif key == '流通市值':
-                            info['float_market_cap'] = value
-                        elif key == '行业':
-                            info['industry'] = value
+                    # item/value两列一次性zip成dict再查键，
+                    # 不用iterrows逐行物化Series
+                    fund_map = dict(zip(fundamental['item'].to_numpy(),
+                                        fundamental['value'].to_numpy()))
+                    if '总市值' in fund_map:
+                        info['total_market_cap'] = fund_map['总市值']
+                    if '流通市值' in fund_map:
+                        info['float_market_cap'] = fund_map['流通市值']
+                    if '行业' in fund_map:
+                        info['industry'] = fund_map['行业']
             except:
                 pass  # 如果获取基本面信息失败，忽略
             
             return info
         
         except Exception as e:
-            self.logger.error(f"获取股票{symbol}信息失败: {e}")
+            self.logger.error("获取股票%s信息失败: %s", symbol, e)
             return {}
     
-    def get_price_data(self, symbol: str, start_date: str = None, 
+    @cached()
+    def get_price_data(self, symbol: str, start_date: str = None,
                       end_date: str = None, period: str = "daily") -> pd.DataFrame:
         """获取价格数据"""
         try:
@@ -139,35 +182,15 @@ class AKShareDataSource(BaseDataSource):
             if start_date is None:
                 start_date = (datetime.now() - timedelta(days=365)).strftime('%Y%m%d')
             
-            # 根据周期获取数据
-            if period == "daily":
-                df = ak.stock_zh_a_hist(symbol=symbol, start_date=start_date, 
-                                       end_date=end_date, adjust="qfq")
-            elif period == "weekly":
-                df = ak.stock_zh_a_hist(symbol=symbol, start_date=start_date, 
-                                       end_date=end_date, period="weekly", adjust="qfq")
-            elif period == "monthly":
-                df = ak.stock_zh_a_hist(symbol=symbol, start_date=start_date, 
-                                       end_date=end_date, period="monthly", adjust="qfq")
-            else:
-                df = ak.stock_zh_a_hist(symbol=symbol, start_date=start_date, 
-                                       end_date=end_date, adjust="qfq")
-            
+            # 根据周期获取数据（未知周期回退到日线）
+            df = ak.stock_zh_a_hist(symbol=symbol, start_date=start_date,
+                                    end_date=end_date,
+                                    period=_PERIOD_MAP.get(period, 'daily'),
+                                    adjust="qfq")
+
             if df is not None and not df.empty:
-                # 标准化列名
-                df = df.rename(columns={
-                    '日期': 'date',
-                    '开盘': 'open',
-                    '收盘': 'close',
-                    '最高': 'high',
-                    '最低': 'low',
-                    '成交量': 'volume',
-                    '成交额': 'amount',
-                    '振幅': 'amplitude',
-                    '涨跌幅': 'pct_change',
-                    '涨跌额': 'change',
-                    '换手率': 'turnover_rate'
-                })
+                # 标准化列名（只替换列Index，不拷贝数据）
+                df.columns = [_HIST_COLMAP.get(c, c) for c in df.columns]
                 
                 # 确保日期列是datetime类型
                 df['date'] = pd.to_datetime(df['date'])
@@ -176,11 +199,11 @@ class AKShareDataSource(BaseDataSource):
                 # 添加symbol列
                 df['symbol'] = symbol
                 
-                self.logger.info(f"获取股票{symbol}价格数据成功，共{len(df)}条记录")
+                self.logger.info("获取股票%s价格数据成功，共%s条记录", symbol, len(df))
                 return df
         
         except Exception as e:
-            self.logger.error(f"获取股票{symbol}价格数据失败: {e}")
+            self.logger.error("获取股票%s价格数据失败: %s", symbol, e)
         
         return pd.DataFrame()
     
@@ -191,17 +214,21 @@ class AKShareDataSource(BaseDataSource):
             all_data = self.get_stock_list()
             
             if not all_data.empty and symbols:
-                # 筛选指定的股票
-                filtered_data = all_data[all_data['symbol'].isin(symbols)]
-                
-                # 添加时间戳
-                filtered_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-                self.logger.info(f"获取{len(symbols)}只股票实时数据成功")
+                # 按symbol索引直接取K行（不做整列isin扫描），
+                # assign返回新对象，绕开SettingWithCopy的二次拷贝
+                indexed = self._indexed_stock_list(all_data)
+                filtered_data = (
+                    indexed.reindex(symbols)
+                    .dropna(subset=['name'])
+                    .assign(timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                    .reset_index(drop=True)
+                )
+
+                self.logger.info("获取%s只股票实时数据成功", len(symbols))
                 return filtered_data
         
         except Exception as e:
-            self.logger.error(f"获取实时数据失败: {e}")
+            self.logger.error("获取实时数据失败: %s", e)
         
         return pd.DataFrame()
     
@@ -229,10 +256,10 @@ class AKShareDataSource(BaseDataSource):
         try:
             df = ak.stock_board_industry_summary_ths()
             if df is not None and not df.empty:
-                self.logger.info(f"获取行业数据成功，共{len(df)}个行业")
+                self.logger.info("获取行业数据成功，共%s个行业", len(df))
                 return df
         except Exception as e:
-            self.logger.error(f"获取行业数据失败: {e}")
+            self.logger.error("获取行业数据失败: %s", e)
         return pd.DataFrame()
     
     def get_concept_data(self) -> pd.DataFrame:
@@ -240,8 +267,8 @@ class AKShareDataSource(BaseDataSource):
         try:
             df = ak.stock_board_concept_summary_ths()
             if df is not None and not df.empty:
-                self.logger.info(f"获取概念数据成功，共{len(df)}个概念")
+                self.logger.info("获取概念数据成功，共%s个概念", len(df))
                 return df
         except Exception as e:
-            self.logger.error(f"获取概念数据失败: {e}")
+            self.logger.error("获取概念数据失败: %s", e)
         return pd.DataFrame()
\ No newline at end of file
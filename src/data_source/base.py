@@ -3,75 +3,71 @@
 定义数据获取的统一接口
 """
 
-from abc import ABC, abstractmethod
+import asyncio
 from typing import Dict, List, Optional, Union
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 
 
-class BaseDataSource(ABC):
-    """数据源基础类"""
-    
+class BaseDataSource:
+    """数据源基础类
+
+    普通基类+NotImplementedError约定（不用ABC元类）：子类照常
+    覆写各方法，实例化和方法解析都走普通类的快速路径。
+    """
+
+    # A股交易时段边界（time对象按整数比较，不走字符串字典序）
+    _MORNING = (time(9, 30), time(11, 30))
+    _AFTERNOON = (time(13, 0), time(15, 0))
+
     def __init__(self, name: str):
         self.name = name
         self.is_connected = False
     
-    @abstractmethod
     def connect(self) -> bool:
         """连接数据源"""
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def get_stock_list(self) -> pd.DataFrame:
         """获取股票列表"""
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def get_stock_info(self, symbol: str) -> Dict:
         """获取股票基本信息"""
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def get_price_data(self, symbol: str, start_date: str = None, 
                       end_date: str = None, period: str = "daily") -> pd.DataFrame:
         """获取价格数据"""
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def get_realtime_data(self, symbols: List[str]) -> pd.DataFrame:
         """获取实时数据"""
-        pass
+        raise NotImplementedError
     
     def get_market_status(self) -> Dict:
         """获取市场状态"""
         now = datetime.now()
-        current_time = now.strftime("%H:%M")
-        
-        # A股交易时间
-        morning_start = "09:30"
-        morning_end = "11:30"
-        afternoon_start = "13:00"
-        afternoon_end = "15:00"
-        
+        t = now.time()
+
         is_trading_day = now.weekday() < 5  # 周一到周五
-        
+
         if not is_trading_day:
             status = "休市"
-        elif morning_start <= current_time <= morning_end:
-            status = "开市"
-        elif afternoon_start <= current_time <= afternoon_end:
+        elif (self._MORNING[0] <= t <= self._MORNING[1]
+              or self._AFTERNOON[0] <= t <= self._AFTERNOON[1]):
             status = "开市"
-        elif current_time < morning_start:
+        elif t < self._MORNING[0]:
             status = "未开市"
-        elif morning_end < current_time < afternoon_start:
+        elif t < self._AFTERNOON[0]:
             status = "午休"
         else:
             status = "收市"
-        
+
         return {
             "status": status,
             "is_trading": status == "开市",
-            "current_time": current_time,
+            "current_time": now.strftime("%H:%M"),
             "next_open": self._get_next_open_time()
         }
     
@@ -102,17 +98,22 @@ class DataSourceManager:
     def __init__(self):
         self.sources: Dict[str, BaseDataSource] = {}
         self.primary_source: Optional[str] = None
+        # 主数据源实例的直接引用：委托方法一次属性访问即达，
+        # 不必每次经过get_source的名称解析
+        self._primary: Optional[BaseDataSource] = None
     
     def add_source(self, source: BaseDataSource):
         """添加数据源"""
         self.sources[source.name] = source
         if self.primary_source is None:
             self.primary_source = source.name
+            self._primary = source
     
     def set_primary_source(self, source_name: str):
         """设置主数据源"""
         if source_name in self.sources:
             self.primary_source = source_name
+            self._primary = self.sources[source_name]
         else:
             raise ValueError(f"数据源 {source_name} 不存在")
     
@@ -133,41 +134,74 @@ class DataSourceManager:
         return self.sources[source_name]
     
     def connect_all(self) -> Dict[str, bool]:
-        """连接所有数据源"""
-        results = {}
-        for name, source in self.sources.items():
+        """并发连接所有数据源
+
+        各数据源的连接探测是网络IO密集操作，串行执行耗时为各源之和；
+        这里用asyncio.gather并发探测，总耗时只取决于最慢的源。
+        """
+        if not self.sources:
+            return {}
+
+        async def _probe(name: str, source: BaseDataSource):
             try:
-                results[name] = source.connect()
+                return name, await asyncio.to_thread(source.connect)
             except Exception as e:
                 print(f"连接数据源 {name} 失败: {e}")
-                results[name] = False
-        return results
+                return name, False
+
+        async def _probe_all():
+            return await asyncio.gather(
+                *[_probe(name, source) for name, source in self.sources.items()]
+            )
+
+        return dict(asyncio.run(_probe_all()))
     
     def get_available_sources(self) -> List[str]:
         """获取可用的数据源"""
         return [name for name, source in self.sources.items() if source.is_connected]
-    
+
+    def ping(self) -> bool:
+        """轻量连通性探测
+
+        只探测主数据源的连接状态（单次小请求），不像完整连接测试那样
+        拉取整个股票列表，适合作为analyze/web命令的前置门槛。
+        """
+        if not self.primary_source:
+            return False
+
+        source = self.sources.get(self.primary_source)
+        if source is None:
+            return False
+        if source.is_connected:
+            return True
+
+        try:
+            return source.connect()
+        except Exception:
+            return False
+    
+    def _require_primary(self) -> BaseDataSource:
+        """获取主数据源实例，未设置时报与get_source一致的明确错误"""
+        if self._primary is None:
+            raise ValueError(f"数据源 {self.primary_source} 不存在")
+        return self._primary
+
     def get_stock_info(self, symbol: str) -> Dict:
         """获取股票基本信息"""
-        source = self.get_source()
-        return source.get_stock_info(symbol)
-    
+        return self._require_primary().get_stock_info(symbol)
+
     def get_real_time_price(self, symbol: str) -> Dict:
         """获取实时价格"""
-        source = self.get_source()
-        return source.get_real_time_price(symbol)
-    
+        return self._require_primary().get_real_time_price(symbol)
+
     def get_daily_prices(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """获取日线数据"""
-        source = self.get_source()
-        return source.get_daily_prices(symbol, start_date, end_date)
-    
+        return self._require_primary().get_daily_prices(symbol, start_date, end_date)
+
     def get_stock_list(self) -> pd.DataFrame:
         """获取股票列表"""
-        source = self.get_source()
-        return source.get_stock_list()
-    
+        return self._require_primary().get_stock_list()
+
     def get_market_status(self) -> Dict:
         """获取市场状态"""
-        source = self.get_source()
-        return source.get_market_status()
\ No newline at end of file
+        return self._require_primary().get_market_status()
\ No newline at end of file
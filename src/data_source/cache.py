@@ -0,0 +1,139 @@
+"""
+数据源缓存模块
+为数据源HTTP调用提供进程内+磁盘两级TTL缓存
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import logging
+from functools import wraps
+
+try:
+    from config import MONITORING
+    DEFAULT_TTL = MONITORING["update_interval"]
+except ImportError:
+    DEFAULT_TTL = 300  # 默认5分钟，与MONITORING["update_interval"]保持一致
+
+CACHE_DIR = os.path.join("data", "cache")
+
+logger = logging.getLogger(__name__)
+
+# 一级缓存：进程内字典，key -> (过期时刻, 结果)
+_memory_cache = {}
+
+# 磁盘缓存清扫参数：key包含全部调用参数（如日线的起止日期），
+# 组合数会随时间无限增长，定期删除早已过期的pkl防止目录膨胀。
+# 最大保留时长取各TTL档位最大值（股票列表3600秒）的若干倍
+_PRUNE_MAX_AGE = 24 * 3600
+# 两次清扫的最小间隔，避免每次写缓存都扫描整个目录
+_PRUNE_INTERVAL = 3600
+_last_prune = 0.0
+
+
+def _prune_expired(now: float):
+    """清除过期的内存缓存条目和磁盘中早已过期的pkl/tmp文件"""
+    global _last_prune
+    if now - _last_prune < _PRUNE_INTERVAL:
+        return
+    _last_prune = now
+
+    # 内存层：key包含调用参数（如滚动的起止日期），命中才覆盖的
+    # 写法下过期条目会无限累积，长驻进程（web模式）必须主动清除
+    for key in [k for k, entry in _memory_cache.items() if now >= entry[0]]:
+        _memory_cache.pop(key, None)
+
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for entry in it:
+                if (entry.name.endswith(('.pkl', '.tmp'))
+                        and now - entry.stat().st_mtime > _PRUNE_MAX_AGE):
+                    os.remove(entry.path)
+    except FileNotFoundError:
+        pass  # 缓存目录尚未创建
+    except Exception as e:
+        logger.debug(f"清理过期磁盘缓存失败: {e}")
+
+
+def _cache_key(source_name: str, method_name: str, args, kwargs) -> str:
+    """生成缓存key，包含数据源名称、方法名和全部参数"""
+    raw = repr((source_name, method_name, args, sorted(kwargs.items())))
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _is_empty_result(result) -> bool:
+    """判断结果是否为空（空结果不缓存，避免把一次失败固化整个TTL窗口）"""
+    if result is None:
+        return True
+    if hasattr(result, 'empty'):  # DataFrame / Series
+        return bool(result.empty)
+    try:
+        return not result
+    except (ValueError, TypeError):
+        return False
+
+
+def cached(ttl: int = None):
+    """两级TTL缓存装饰器（进程内存 + 磁盘pickle）
+
+    用于数据源实例方法：同一symbol在TTL窗口内的重复请求直接命中
+    内存或磁盘缓存，不再发起网络请求。设置环境变量
+    STOCK_ANALYSIS_NO_CACHE=1 可绕过缓存。
+    :param ttl: 缓存有效期（秒），默认取MONITORING["update_interval"]
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if os.environ.get('STOCK_ANALYSIS_NO_CACHE'):
+                return func(self, *args, **kwargs)
+
+            expire = ttl if ttl is not None else DEFAULT_TTL
+            key = _cache_key(getattr(self, 'name', ''), func.__name__, args, kwargs)
+            now = time.time()
+
+            # 一级：进程内缓存
+            entry = _memory_cache.get(key)
+            if entry is not None and now < entry[0]:
+                return entry[1]
+
+            # 二级：磁盘缓存（跨进程/跨CLI调用共享）
+            cache_file = os.path.join(CACHE_DIR, f"{key}.pkl")
+            try:
+                if os.path.exists(cache_file) and now - os.path.getmtime(cache_file) < expire:
+                    with open(cache_file, 'rb') as f:
+                        result = pickle.load(f)
+                    _memory_cache[key] = (now + expire, result)
+                    return result
+            except Exception as e:
+                logger.debug(f"读取磁盘缓存失败: {e}")
+
+            result = func(self, *args, **kwargs)
+
+            if not _is_empty_result(result):
+                _memory_cache[key] = (now + expire, result)
+                try:
+                    os.makedirs(CACHE_DIR, exist_ok=True)
+                    tmp_file = cache_file + '.tmp'
+                    with open(tmp_file, 'wb') as f:
+                        pickle.dump(result, f)
+                    os.replace(tmp_file, cache_file)
+                    _prune_expired(now)
+                except Exception as e:
+                    logger.debug(f"写入磁盘缓存失败: {e}")
+
+            return result
+        return wrapper
+    return decorator
+
+
+def clear_cache():
+    """清空内存和磁盘缓存"""
+    _memory_cache.clear()
+    try:
+        if os.path.isdir(CACHE_DIR):
+            for filename in os.listdir(CACHE_DIR):
+                if filename.endswith('.pkl'):
+                    os.remove(os.path.join(CACHE_DIR, filename))
+    except Exception as e:
+        logger.warning(f"清理磁盘缓存失败: {e}")
@@ -3,13 +3,41 @@
 免费可靠的股票数据获取
 """
 
+import functools
+import io
 import requests
+import numpy as np
 import pandas as pd
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import logging
 from typing import Dict, List, Optional
 from .base import BaseDataSource
+from .cache import cached
+from .session import get_pooled_session
+
+# orjson为可选加速依赖（C实现的JSON解析器），未安装时回退stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 热路径请求的字段串（模块级常量，避免每次请求重建长字符串）
+_KLINE_FIELDS2 = 'f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61'
+_RTD_FIELDS = 'f58,f57,f43,f169,f170,f46,f44,f51,f168,f47,f164,f163,f116,f60,f45,f52,f50,f48,f167,f117,f71,f161,f49,f530,f135,f136,f137,f138,f139,f141,f142,f144,f145,f147,f148,f140,f143,f146,f149,f55,f62,f162,f92,f173,f104,f105,f84,f85,f183,f184,f185,f186,f187,f188,f189,f190,f191,f192,f107,f111,f86,f177,f78,f110,f262,f263,f264,f267,f268,f255,f256,f257,f258'
+
+
+def _parse_json(response) -> dict:
+    """解析HTTP响应的JSON正文
+
+    clist接口一次返回约5000条、1~2MB的JSON，orjson解析比
+    stdlib快数倍；返回的仍是普通dict，调用方无感知。
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
 
 
 class EastMoneyDataSource(BaseDataSource):
@@ -19,7 +47,7 @@ class EastMoneyDataSource(BaseDataSource):
         super().__init__("eastmoney")
         self.description = "东方财富 - 免费股票数据接口"
         self.base_url = "http://push2.eastmoney.com"
-        self.session = requests.Session()
+        self.session = get_pooled_session(self.name)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
@@ -37,7 +65,7 @@ class EastMoneyDataSource(BaseDataSource):
             response = self.session.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _parse_json(response)
                 if data.get('rc') == 0:  # 东方财富的成功返回码
                     self.logger.info("东方财富数据源连接成功")
                     self.is_connected = True
@@ -48,12 +76,13 @@ class EastMoneyDataSource(BaseDataSource):
             return False
             
         except Exception as e:
-            self.logger.error(f"东方财富数据源连接测试失败: {e}")
+            self.logger.error("东方财富数据源连接测试失败: %s", e)
             self.is_connected = False
             return False
     
+    @cached(ttl=3600)
     def get_stock_list(self) -> pd.DataFrame:
-        """获取股票列表"""
+        """获取股票列表（缓存1小时）"""
         try:
             # 获取A股列表
             url = f"{self.base_url}/api/qt/clist/get"
@@ -67,41 +96,38 @@ class EastMoneyDataSource(BaseDataSource):
                 'invt': '2',
                 'fid': 'f3',
                 'fs': 'm:0+t:6,m:0+t:80,m:1+t:2,m:1+t:23',  # A股
-                'fields': 'f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f12,f13,f14,f15,f16,f17,f18,f20,f21,f23,f24,f25,f22,f11,f62,f128,f136,f115,f152'
+                # 只要代码和名称两个字段：响应从1~2MB缩到约百KB量级，
+                # 解析时不再物化几十万个用不到的dict条目
+                'fields': 'f12,f14'
             }
             
             response = self.session.get(url, params=params, timeout=30)
             
             if response.status_code != 200:
-                self.logger.error(f"获取股票列表失败，状态码: {response.status_code}")
+                self.logger.error("获取股票列表失败，状态码: %s", response.status_code)
                 return pd.DataFrame()
             
-            data = response.json()
+            data = _parse_json(response)
             
             if data.get('rc') != 0 or not data.get('data', {}).get('diff'):
                 self.logger.error("东方财富返回数据格式错误")
                 return pd.DataFrame()
             
-            stocks = []
-            for item in data['data']['diff']:
-                symbol = item.get('f12', '')
-                name = item.get('f14', '')
-                
-                if symbol and name:
-                    stocks.append({
-                        'symbol': symbol,
-                        'name': name,
-                        'market': 'SH' if symbol.startswith('6') else 'SZ'
-                    })
-            
-            df = pd.DataFrame(stocks)
-            self.logger.info(f"获取到{len(df)}只股票信息")
+            # 整列构建：原始diff直接进DataFrame，市场归属用np.where
+            # 向量化判断，替代逐行append dict再推断dtype
+            df = pd.DataFrame(data['data']['diff'], columns=['f12', 'f14'])
+            df.columns = ['symbol', 'name']
+            df = df[(df['symbol'] != '') & (df['name'] != '')
+                    & df['symbol'].notna() & df['name'].notna()].reset_index(drop=True)
+            df['market'] = np.where(df['symbol'].str.startswith('6'), 'SH', 'SZ')
+            self.logger.info("获取到%s只股票信息", len(df))
             return df
             
         except Exception as e:
-            self.logger.error(f"获取股票列表失败: {e}")
+            self.logger.error("获取股票列表失败: %s", e)
             return pd.DataFrame()
     
+    @cached()
     def get_daily_prices(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """获取日线数据"""
         try:
@@ -114,7 +140,7 @@ class EastMoneyDataSource(BaseDataSource):
                 'secid': secid,
                 'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
                 'fields1': 'f1,f2,f3,f4,f5,f6',
-                'fields2': 'f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61',
+                'fields2': _KLINE_FIELDS2,
                 'klt': '101',  # 日K线
                 'fqt': '1',    # 前复权
                 'beg': start_date,
@@ -126,60 +152,50 @@ class EastMoneyDataSource(BaseDataSource):
             response = self.session.get(url, params=params, timeout=30)
             
             if response.status_code != 200:
-                self.logger.error(f"获取{symbol}历史数据失败，状态码: {response.status_code}")
+                self.logger.error("获取%s历史数据失败，状态码: %s", symbol, response.status_code)
                 return pd.DataFrame()
             
-            data = response.json()
-            
-            # 添加详细的调试信息
-            if data.get('rc') != 0:
-                self.logger.warning(f"股票{symbol}历史数据API返回错误码: {data.get('rc')}, 消息: {data.get('msg', 'N/A')}")
-                return self._try_alternative_history_api(symbol, start_date, end_date)
-            
-            if not data.get('data'):
-                self.logger.warning(f"股票{symbol}无数据字段")
-                return self._try_alternative_history_api(symbol, start_date, end_date)
-            
-            if not data.get('data', {}).get('klines'):
-                self.logger.warning(f"股票{symbol}无K线数据")
+            data = _parse_json(response)
+
+            # 主路径判定合并为一次：rc为0且data.klines非空；
+            # %s延迟格式化，日志级别高于WARNING时不构造消息串
+            klines = ((data.get('data') or {}).get('klines')
+                      if data.get('rc') == 0 else None)
+            if not klines:
+                self.logger.warning(
+                    "股票%s历史数据获取失败: rc=%s, 消息=%s",
+                    symbol, data.get('rc'), data.get('msg', 'N/A'))
                 return self._try_alternative_history_api(symbol, start_date, end_date)
-            
-            # 解析K线数据
-            klines = data['data']['klines']
-            rows = []
-            
-            for kline in klines:
-                parts = kline.split(',')
-                if len(parts) >= 11:
-                    try:
-                        rows.append({
-                            'date': parts[0],
-                            'open': float(parts[1]),
-                            'close': float(parts[2]),
-                            'high': float(parts[3]),
-                            'low': float(parts[4]),
-                            'volume': float(parts[5]),
-                            'turnover': float(parts[6]),
-                            'pct_change': float(parts[8]),
-                            'symbol': symbol
-                        })
-                    except (ValueError, IndexError) as e:
-                        self.logger.warning(f"解析K线数据失败: {e}, 数据: {kline}")
-                        continue
-            
-            df = pd.DataFrame(rows)
+
+            # 解析K线数据：拼成CSV缓冲交给pandas的C解析器一次性
+            # 切分+转型，替代逐行split/float的Python循环
+            df = pd.read_csv(
+                io.StringIO('\n'.join(klines)), header=None,
+                names=['date', 'open', 'close', 'high', 'low', 'volume',
+                       'turnover', 'amplitude', 'pct_change', 'change',
+                       'turnover_rate'],
+                usecols=[0, 1, 2, 3, 4, 5, 6, 8],
+                # float32对价格（分辨率到分）和手数级成交量足够，
+                # 内存和下游带宽减半
+                dtype={'open': 'float32', 'close': 'float32',
+                       'high': 'float32', 'low': 'float32',
+                       'volume': 'float32', 'turnover': 'float32',
+                       'pct_change': 'float32'},
+                on_bad_lines='skip'
+            )
+            df['symbol'] = symbol
             if not df.empty:
                 df['date'] = pd.to_datetime(df['date'])
                 df = df.sort_values('date')
-                self.logger.info(f"获取到{symbol} {len(df)}条历史数据")
+                self.logger.info("获取到%s %s条历史数据", symbol, len(df))
             else:
-                self.logger.warning(f"股票{symbol}解析后无有效历史数据")
+                self.logger.warning("股票%s解析后无有效历史数据", symbol)
                 return self._try_alternative_history_api(symbol, start_date, end_date)
             
             return df
             
         except Exception as e:
-            self.logger.error(f"获取{symbol}历史数据失败: {e}")
+            self.logger.error("获取%s历史数据失败: %s", symbol, e)
             return self._try_alternative_history_api(symbol, start_date, end_date)
     
     def _try_alternative_history_api(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
@@ -205,41 +221,32 @@ class EastMoneyDataSource(BaseDataSource):
             response = self.session.get(url, params=params, timeout=30)
             
             if response.status_code != 200:
-                self.logger.error(f"备用接口获取{symbol}历史数据失败，状态码: {response.status_code}")
+                self.logger.error("备用接口获取%s历史数据失败，状态码: %s", symbol, response.status_code)
                 return pd.DataFrame()
             
-            data = response.json()
+            data = _parse_json(response)
             
             if data.get('rc') != 0 or not data.get('data', {}).get('klines'):
-                self.logger.warning(f"股票{symbol}备用接口也无历史数据")
+                self.logger.warning("股票%s备用接口也无历史数据", symbol)
                 return pd.DataFrame()
             
-            # 解析备用接口数据
+            # 解析备用接口数据：同主接口，整体交给C解析器后再
+            # 用向量化比较过滤日期范围
             klines = data['data']['klines']
-            rows = []
-            
-            for kline in klines:
-                parts = kline.split(',')
-                if len(parts) >= 8:
-                    try:
-                        date_str = parts[0]
-                        # 过滤日期范围
-                        if start_date <= date_str.replace('-', '') <= end_date:
-                            rows.append({
-                                'date': parts[0],
-                                'open': float(parts[1]),
-                                'close': float(parts[2]),
-                                'high': float(parts[3]),
-                                'low': float(parts[4]),
-                                'volume': float(parts[5]),
-                                'turnover': float(parts[6]) if len(parts) > 6 else 0,
-                                'pct_change': 0,  # 备用接口可能没有涨跌幅
-                                'symbol': symbol
-                            })
-                    except (ValueError, IndexError) as e:
-                        continue
-            
-            df = pd.DataFrame(rows)
+            df = pd.read_csv(
+                io.StringIO('\n'.join(klines)), header=None,
+                names=['date', 'open', 'close', 'high', 'low', 'volume',
+                       'turnover', 'amplitude'],
+                usecols=[0, 1, 2, 3, 4, 5, 6],
+                dtype={'open': 'float32', 'close': 'float32',
+                       'high': 'float32', 'low': 'float32',
+                       'volume': 'float32', 'turnover': 'float32'},
+                on_bad_lines='skip'
+            )
+            if not df.empty:
+                compact = df['date'].str.replace('-', '', regex=False)
+                df = df[(compact >= start_date) & (compact <= end_date)].copy()
+                df['symbol'] = symbol
             if not df.empty:
                 df['date'] = pd.to_datetime(df['date'])
                 df = df.sort_values('date')
@@ -247,18 +254,19 @@ class EastMoneyDataSource(BaseDataSource):
                 df['pct_change'] = df['close'].pct_change() * 100
                 df.loc[df['pct_change'].isna(), 'pct_change'] = 0
                 
-                self.logger.info(f"备用接口获取到{symbol} {len(df)}条历史数据")
+                self.logger.info("备用接口获取到%s %s条历史数据", symbol, len(df))
                 return df
             else:
-                self.logger.warning(f"股票{symbol}备用接口解析后仍无有效数据")
+                self.logger.warning("股票%s备用接口解析后仍无有效数据", symbol)
                 return pd.DataFrame()
                 
         except Exception as e:
-            self.logger.error(f"备用接口获取{symbol}历史数据失败: {e}")
+            self.logger.error("备用接口获取%s历史数据失败: %s", symbol, e)
             return pd.DataFrame()
     
+    @cached(ttl=3)
     def get_real_time_price(self, symbol: str) -> Dict:
-        """获取实时价格"""
+        """获取实时价格（缓存3秒，轮询场景下避免重复请求）"""
         try:
             secid = self._convert_symbol(symbol)
             
@@ -266,7 +274,7 @@ class EastMoneyDataSource(BaseDataSource):
             params = {
                 'secid': secid,
                 'ut': 'fa5fd1943c7b386f172d6893dbfba10b',
-                'fields': 'f58,f57,f43,f169,f170,f46,f44,f51,f168,f47,f164,f163,f116,f60,f45,f52,f50,f48,f167,f117,f71,f161,f49,f530,f135,f136,f137,f138,f139,f141,f142,f144,f145,f147,f148,f140,f143,f146,f149,f55,f62,f162,f92,f173,f104,f105,f84,f85,f183,f184,f185,f186,f187,f188,f189,f190,f191,f192,f107,f111,f86,f177,f78,f110,f262,f263,f264,f267,f268,f255,f256,f257,f258'
+                'fields': _RTD_FIELDS
             }
             
             response = self.session.get(url, params=params, timeout=10)
@@ -274,7 +282,7 @@ class EastMoneyDataSource(BaseDataSource):
             if response.status_code != 200:
                 return {}
             
-            data = response.json()
+            data = _parse_json(response)
             
             if data.get('rc') != 0 or not data.get('data'):
                 return {}
@@ -296,11 +304,12 @@ class EastMoneyDataSource(BaseDataSource):
             }
             
         except Exception as e:
-            self.logger.error(f"获取{symbol}实时数据失败: {e}")
+            self.logger.error("获取%s实时数据失败: %s", symbol, e)
             return {}
     
+    @cached(ttl=30)
     def get_stock_info(self, symbol: str) -> Dict:
-        """获取股票基本信息"""
+        """获取股票基本信息（缓存30秒）"""
         try:
             # 先获取实时数据
             real_time = self.get_real_time_price(symbol)
@@ -321,7 +330,7 @@ class EastMoneyDataSource(BaseDataSource):
             }
             
         except Exception as e:
-            self.logger.error(f"获取{symbol}基本信息失败: {e}")
+            self.logger.error("获取%s基本信息失败: %s", symbol, e)
             return {}
     
     def get_market_status(self) -> Dict:
@@ -344,7 +353,7 @@ class EastMoneyDataSource(BaseDataSource):
             }
             
         except Exception as e:
-            self.logger.error(f"获取市场状态失败: {e}")
+            self.logger.error("获取市场状态失败: %s", e)
             return {
                 'is_trading': False,
                 'market_time': '',
@@ -352,8 +361,10 @@ class EastMoneyDataSource(BaseDataSource):
                 'data_source': self.name
             }
     
-    def _convert_symbol(self, symbol: str) -> str:
-        """转换股票代码为东方财富格式"""
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def _convert_symbol(symbol: str) -> str:
+        """转换股票代码为东方财富格式（热门代码的结果LRU缓存）"""
         if symbol.startswith('6'):
             return f"1.{symbol}"  # 上海
         else:
@@ -369,12 +380,78 @@ class EastMoneyDataSource(BaseDataSource):
         
         return self.get_daily_prices(symbol, start_date, end_date)
     
+    # clist批量行情的字段映射（与get_real_time_price的单股字段对应）
+    _CLIST_RENAME = {
+        'f12': 'symbol', 'f14': 'name', 'f2': 'price', 'f4': 'change',
+        'f3': 'pct_change', 'f17': 'open', 'f15': 'high', 'f16': 'low',
+        'f5': 'volume', 'f6': 'turnover'
+    }
+
+    def _get_realtime_batch(self, symbols: List[str]) -> pd.DataFrame:
+        """用clist接口一次拉取全市场行情并在内存中筛选
+
+        单股接口一只股票一次往返，clist一次往返就能带回几千只
+        报价（fltt=2时价格字段已是元），N次HTTP收缩为1次。
+        """
+        url = f"{self.base_url}/api/qt/clist/get"
+        params = {
+            'pn': '1',
+            'pz': '5000',
+            'po': '1',
+            'np': '1',
+            'ut': 'bd1d9ddb04089700cf9c27f6f7426281',
+            'fltt': '2',
+            'invt': '2',
+            'fid': 'f3',
+            'fs': 'm:0+t:6,m:0+t:80,m:1+t:2,m:1+t:23',  # A股
+            'fields': ','.join(self._CLIST_RENAME)
+        }
+
+        response = self.session.get(url, params=params, timeout=30)
+        if response.status_code != 200:
+            return pd.DataFrame()
+
+        data = _parse_json(response)
+        if data.get('rc') != 0 or not data.get('data', {}).get('diff'):
+            return pd.DataFrame()
+
+        df = pd.DataFrame(data['data']['diff'])
+        df = df[df['f12'].isin(set(symbols))]
+        df = df.rename(columns=self._CLIST_RENAME)
+        df['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return df.reset_index(drop=True)
+
     def get_realtime_data(self, symbols: List[str]) -> pd.DataFrame:
-        """获取实时数据"""
-        data_list = []
-        for symbol in symbols:
-            real_time = self.get_real_time_price(symbol)
-            if real_time:
-                data_list.append(real_time)
-        
-        return pd.DataFrame(data_list)
\ No newline at end of file
+        """获取实时数据
+
+        多只股票优先走clist批量接口（1次往返覆盖全部代码）；
+        批量漏掉的代码和批量失败时回退到线程池并发的单股接口，
+        总耗时从sum(RTT)降到约max(RTT)。
+        """
+        if not symbols:
+            return pd.DataFrame()
+
+        if len(symbols) == 1:
+            real_time = self.get_real_time_price(symbols[0])
+            return pd.DataFrame([real_time] if real_time else [])
+
+        try:
+            batch_df = self._get_realtime_batch(symbols)
+        except Exception as e:
+            self.logger.warning("批量实时行情获取失败，回退单股接口: %s", e)
+            batch_df = pd.DataFrame()
+
+        missing = (list(symbols) if batch_df.empty
+                   else [s for s in symbols if s not in set(batch_df['symbol'])])
+        if not missing:
+            return batch_df
+
+        # 并发补齐批量接口未覆盖的代码（并发上限32）
+        with ThreadPoolExecutor(max_workers=min(32, len(missing))) as executor:
+            results = executor.map(self.get_real_time_price, missing)
+
+        data_list = [real_time for real_time in results if real_time]
+        fallback_df = pd.DataFrame(data_list)
+        if batch_df.empty:
+            return fallback_df
+        return pd.concat([batch_df, fallback_df], ignore_index=True)
\ No newline at end of file
@@ -3,15 +3,31 @@
 统一管理和创建数据源实例
 """
 
-from typing import Dict, Optional, List
+import importlib
+from types import MappingProxyType
+from typing import Dict, Optional, List, Tuple
+from functools import lru_cache
 import logging
 from .base import DataSourceManager
-from .akshare_source import AKShareDataSource
-from .tushare_source import TushareDataSource
-from .eastmoney_source import EastMoneyDataSource
-from .sina_source import SinaDataSource
-from .qqstock_source import QQStockDataSource
-from .wangyi_source import WangYiDataSource
+
+# 数据源懒加载注册表：模块在首次真正启用时才导入，
+# 避免冷启动无条件拉起akshare/tushare等重量级依赖
+# （只启用sina/qq的配置下导入耗时从秒级降到毫秒级）
+_SOURCE_REGISTRY = {
+    'akshare': ('.akshare_source', 'AKShareDataSource'),
+    'tushare': ('.tushare_source', 'TushareDataSource'),
+    'eastmoney': ('.eastmoney_source', 'EastMoneyDataSource'),
+    'sina': ('.sina_source', 'SinaDataSource'),
+    'qqstock': ('.qqstock_source', 'QQStockDataSource'),
+    'wangyi': ('.wangyi_source', 'WangYiDataSource'),
+}
+
+
+def _load_source_class(source_name: str):
+    """按名称懒加载数据源类（importlib对已导入模块直接走sys.modules）"""
+    module_name, class_name = _SOURCE_REGISTRY[source_name]
+    module = importlib.import_module(module_name, package=__package__)
+    return getattr(module, class_name)
 
 
 class DataSourceFactory:
@@ -49,24 +65,17 @@ class DataSourceFactory:
             if not source_config.get('enabled', True):
                 continue
                 
+            if source_name not in _SOURCE_REGISTRY:
+                logger.warning(f"未知的数据源类型: {source_name}")
+                continue
+
             try:
-                if source_name == 'akshare':
-                    source = AKShareDataSource()
-                elif source_name == 'tushare':
-                    token = source_config.get('token')
-                    source = TushareDataSource(token=token)
-                elif source_name == 'eastmoney':
-                    source = EastMoneyDataSource()
-                elif source_name == 'sina':
-                    source = SinaDataSource()
-                elif source_name == 'qqstock':
-                    source = QQStockDataSource()
-                elif source_name == 'wangyi':
-                    source = WangYiDataSource()
+                source_cls = _load_source_class(source_name)
+                if source_name == 'tushare':
+                    source = source_cls(token=source_config.get('token'))
                 else:
-                    logger.warning(f"未知的数据源类型: {source_name}")
-                    continue
-                
+                    source = source_cls()
+
                 manager.add_source(source)
                 logger.info(f"{source_name}数据源已添加")
                 
@@ -78,67 +87,77 @@ class DataSourceFactory:
     @staticmethod
     def get_available_sources() -> List[str]:
         """获取可用的数据源列表"""
-        return ['eastmoney', 'tushare', 'akshare', 'sina', 'qqstock', 'wangyi']
-    
+        return list(_SUPPORTED_SOURCES)
+
     @staticmethod
     def get_source_info() -> Dict:
-        """获取数据源信息"""
-        return {
-            'eastmoney': {
-                'name': '东方财富',
-                'description': '免费可靠的股票数据接口',
-                'features': ['股票行情', '历史数据', '基本信息', '实时数据'],
-                'free': True,
-                'realtime': True,
-                'priority': 1
-            },
-            'tushare': {
-                'name': 'Tushare',
-                'description': '专业的金融数据接口',
-                'features': ['股票行情', '财务数据', '资金流向', '基本面数据'],
-                'free': False,
-                'realtime': False,
-                'requires_token': True,
-                'priority': 2
-            },
-            'akshare': {
-                'name': 'AKShare',
-                'description': '免费的中国金融数据接口',
-                'features': ['股票行情', '基本信息', '行业数据', '概念数据'],
-                'free': True,
-                'realtime': True,
-                'priority': 3
-            },
-            'sina': {
-                'name': '新浪财经',
-                'description': '实时股票行情数据',
-                'features': ['实时数据', '分时数据'],
-                'free': True,
-                'realtime': True,
-                'priority': 4
-            },
-            'qqstock': {
-                'name': '腾讯股票',
-                'description': '实时行情数据',
-                'features': ['实时数据', '历史数据', 'K线数据'],
-                'free': True,
-                'realtime': True,
-                'priority': 5
-            },
-            'wangyi': {
-                'name': '网易财经',
-                'description': '股票行情数据',
-                'features': ['实时数据', '历史数据'],
-                'free': True,
-                'realtime': True,
-                'priority': 6
-            }
-        }
+        """获取数据源信息（模块级常量的只读视图，每次调用零分配）"""
+        return _SOURCE_INFO
+
+
+# 支持的数据源名称（按默认优先级排列）与静态描述，模块加载时构建一次；
+# MappingProxyType只读视图防止调用方意外改写共享字典
+_SUPPORTED_SOURCES = ('eastmoney', 'tushare', 'akshare', 'sina', 'qqstock', 'wangyi')
+
+_SOURCE_INFO = MappingProxyType({
+    'eastmoney': {
+        'name': '东方财富',
+        'description': '免费可靠的股票数据接口',
+        'features': ['股票行情', '历史数据', '基本信息', '实时数据'],
+        'free': True,
+        'realtime': True,
+        'priority': 1
+    },
+    'tushare': {
+        'name': 'Tushare',
+        'description': '专业的金融数据接口',
+        'features': ['股票行情', '财务数据', '资金流向', '基本面数据'],
+        'free': False,
+        'realtime': False,
+        'requires_token': True,
+        'priority': 2
+    },
+    'akshare': {
+        'name': 'AKShare',
+        'description': '免费的中国金融数据接口',
+        'features': ['股票行情', '基本信息', '行业数据', '概念数据'],
+        'free': True,
+        'realtime': True,
+        'priority': 3
+    },
+    'sina': {
+        'name': '新浪财经',
+        'description': '实时股票行情数据',
+        'features': ['实时数据', '分时数据'],
+        'free': True,
+        'realtime': True,
+        'priority': 4
+    },
+    'qqstock': {
+        'name': '腾讯股票',
+        'description': '实时行情数据',
+        'features': ['实时数据', '历史数据', 'K线数据'],
+        'free': True,
+        'realtime': True,
+        'priority': 5
+    },
+    'wangyi': {
+        'name': '网易财经',
+        'description': '股票行情数据',
+        'features': ['实时数据', '历史数据'],
+        'free': True,
+        'realtime': True,
+        'priority': 6
+    }
+})
 
 
 # 全局数据源管理器实例
 _global_manager: Optional[DataSourceManager] = None
 
+# 配置版本号，reset时递增，用于让缓存的快照失效
+_config_version: int = 0
+
 
 def get_data_source_manager(config: Optional[Dict] = None) -> DataSourceManager:
     """获取全局数据源管理器"""
@@ -148,11 +167,6 @@ def get_data_source_manager(config: Optional[Dict] = None) -> DataSourceManager:
         # 如果没有传入配置，使用config.py中的配置
         if config is None:
             try:
-                import sys
-                import os
-                # 添加项目根目录到路径
-                project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-                sys.path.insert(0, project_root)
                 from config import DATA_SOURCES
                 config = DATA_SOURCES
             except ImportError:
@@ -183,9 +197,14 @@ def get_data_source_manager(config: Optional[Dict] = None) -> DataSourceManager:
         # 设置主数据源（优先使用连接成功的优先级最高的）
         available_sources = _global_manager.get_available_sources()
         if available_sources:
-            # 按优先级顺序选择主数据源
-            priority_order = ['eastmoney', 'tushare', 'akshare', 'sina', 'qqstock', 'wangyi']
-            
+            # 按优先级顺序选择主数据源（来自config的预排序SoA视图）
+            try:
+                from config import SOURCE_NAMES, SOURCE_ENABLED
+                priority_order = [name for name, enabled in zip(SOURCE_NAMES, SOURCE_ENABLED)
+                                  if enabled]
+            except ImportError:
+                priority_order = ['eastmoney', 'tushare', 'akshare', 'sina', 'qqstock', 'wangyi']
+
             primary_source = None
             for source_name in priority_order:
                 if source_name in connected_sources:
@@ -205,7 +224,35 @@ def get_data_source_manager(config: Optional[Dict] = None) -> DataSourceManager:
     return _global_manager
 
 
+@lru_cache(maxsize=1)
+def _available_sources_snapshot(version: int) -> Tuple[str, ...]:
+    """按配置版本缓存的可用数据源快照"""
+    return tuple(get_data_source_manager().get_available_sources())
+
+
+def get_available_sources() -> Tuple[str, ...]:
+    """获取可用数据源的缓存快照
+
+    连接探测只在管理器初始化时做一次，之后重复查询直接返回缓存的
+    元组；调用reset_data_source_manager后快照自动失效。
+    """
+    return _available_sources_snapshot(_config_version)
+
+
+@lru_cache(maxsize=1)
+def _available_source_set(version: int) -> frozenset:
+    return frozenset(_available_sources_snapshot(version))
+
+
+def get_available_source_set() -> frozenset:
+    """获取可用数据源的frozenset快照，用于O(1)成员判断"""
+    return _available_source_set(_config_version)
+
+
 def reset_data_source_manager():
     """重置全局数据源管理器"""
-    global _global_manager
-    _global_manager = None
\ No newline at end of file
+    global _global_manager, _config_version
+    _global_manager = None
+    _config_version += 1
+    _available_sources_snapshot.cache_clear()
+    _available_source_set.cache_clear()
\ No newline at end of file
@@ -3,13 +3,33 @@
 提供实时行情数据
 """
 
+import functools
 import requests
+import numpy as np
 import pandas as pd
 import json
+from concurrent.futures import ThreadPoolExecutor
+import re
 from datetime import datetime, timedelta
 import logging
 from typing import Dict, List, Optional
 from .base import BaseDataSource
+from .cache import cached
+from .session import get_pooled_session
+
+# orjson为可选加速依赖（C实现的JSON解析器），未安装时回退stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 批量响应的行情行匹配（模块加载时编译一次）
+_QUOTE_RE = re.compile(r'v_(\w+)="([^"]*)"')
+
+
+def _field(parts, i):
+    """取第i个字段并转float（缺失或为空返回0）"""
+    return float(parts[i]) if len(parts) > i and parts[i] else 0
 
 
 class QQStockDataSource(BaseDataSource):
@@ -19,12 +39,14 @@ class QQStockDataSource(BaseDataSource):
         super().__init__("qqstock")
         self.description = "腾讯股票 - 实时行情数据"
         self.base_url = "http://qt.gtimg.cn"
-        self.session = requests.Session()
+        self.session = get_pooled_session(self.name)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
             'Referer': 'http://gu.qq.com/'
         })
         self.logger = logging.getLogger(__name__)
+        # 批量行情分片的并发执行器（Session对GET线程安全，连接池共享）
+        self._executor = ThreadPoolExecutor(max_workers=8)
         
     def connect(self) -> bool:
         """测试连接"""
@@ -80,8 +102,38 @@ class QQStockDataSource(BaseDataSource):
             self.logger.error(f"获取股票列表失败: {e}")
             return pd.DataFrame()
     
+    def _parse_quote(self, symbol: str, data_str: str) -> Dict:
+        """解析单只股票的行情串（v_xxx引号内的~分隔字段）
+
+        最大只用到第37个字段，split限定maxsplit避免为50+个
+        用不到的字段分配子串。
+        """
+        data_parts = data_str.split('~', 38)
+
+        if len(data_parts) < 39:  # 腾讯数据字段很多，不足则视为无效
+            return {}
+
+        # 腾讯数据格式解析
+        try:
+            return {
+                'symbol': symbol,
+                'name': data_parts[1],
+                'price': _field(data_parts, 3),
+                'prev_close': _field(data_parts, 4),
+                'open': _field(data_parts, 5),
+                'high': _field(data_parts, 33),
+                'low': _field(data_parts, 34),
+                'volume': int(_field(data_parts, 6)),
+                'turnover': _field(data_parts, 37),
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+        except (ValueError, IndexError) as e:
+            self.logger.error(f"解析腾讯数据失败: {e}")
+            return {}
+
+    @cached(ttl=3)
     def get_real_time_price(self, symbol: str) -> Dict:
-        """获取实时价格"""
+        """获取实时价格（缓存3秒，轮询场景下避免重复请求）"""
         try:
             qq_symbol = self._convert_symbol(symbol)
             url = f"{self.base_url}/q={qq_symbol}"
@@ -92,43 +144,21 @@ class QQStockDataSource(BaseDataSource):
                 return {}
             
             # 解析腾讯返回的数据
-            content = response.text
-            
             # 腾讯数据格式: v_sz000001="51~平安银行~000001~13.46~13.38~13.50~..."
+            content = response.text
             start_pos = content.find('"') + 1
             end_pos = content.rfind('"')
             
             if start_pos <= 0 or end_pos <= start_pos:
                 return {}
             
-            data_str = content[start_pos:end_pos]
-            data_parts = data_str.split('~')
-            
-            if len(data_parts) < 50:  # 腾讯数据字段很多
-                return {}
-            
-            # 腾讯数据格式解析
-            try:
-                return {
-                    'symbol': symbol,
-                    'name': data_parts[1],
-                    'price': float(data_parts[3]) if data_parts[3] else 0,
-                    'prev_close': float(data_parts[4]) if data_parts[4] else 0,
-                    'open': float(data_parts[5]) if data_parts[5] else 0,
-                    'high': float(data_parts[33]) if len(data_parts) > 33 and data_parts[33] else 0,
-                    'low': float(data_parts[34]) if len(data_parts) > 34 and data_parts[34] else 0,
-                    'volume': int(float(data_parts[6])) if data_parts[6] else 0,
-                    'turnover': float(data_parts[37]) if len(data_parts) > 37 and data_parts[37] else 0,
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-            except (ValueError, IndexError) as e:
-                self.logger.error(f"解析腾讯数据失败: {e}")
-                return {}
+            return self._parse_quote(symbol, content[start_pos:end_pos])
             
         except Exception as e:
             self.logger.error(f"获取{symbol}实时数据失败: {e}")
             return {}
     
+    @cached()
     def get_daily_prices(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """获取日线数据"""
         try:
@@ -147,14 +177,18 @@ class QQStockDataSource(BaseDataSource):
             if response.status_code != 200:
                 return pd.DataFrame()
             
-            # 解析返回数据
-            content = response.text
-            start_pos = content.find('{')
+            # 解析返回数据（直接在bytes上定位JSON体，跳过response.text
+            # 对整个响应的解码；orjson可用时用C解析器）
+            content = response.content
+            start_pos = content.find(b'{')
             if start_pos < 0:
                 return pd.DataFrame()
-                
+
             json_str = content[start_pos:]
-            data = json.loads(json_str)
+            if orjson is not None:
+                data = orjson.loads(json_str)
+            else:
+                data = json.loads(json_str)
             
             if 'data' not in data or not data['data']:
                 return pd.DataFrame()
@@ -163,38 +197,46 @@ class QQStockDataSource(BaseDataSource):
             if 'day' not in stock_data:
                 return pd.DataFrame()
             
-            # 解析K线数据
+            # 解析K线数据：按列收集（SoA布局）后一次性建frame，
+            # 免去pandas对N个行dict的逐列dtype推断和转置
             klines = stock_data['day']
-            rows = []
-            
+            dates, opens, closes, highs, lows, vols = [], [], [], [], [], []
             for kline in klines:
                 if len(kline) >= 6:
-                    rows.append({
-                        'date': kline[0],
-                        'open': float(kline[1]),
-                        'close': float(kline[2]),
-                        'high': float(kline[3]),
-                        'low': float(kline[4]),
-                        'volume': int(float(kline[5])),
-                        'symbol': symbol
-                    })
-            
-            df = pd.DataFrame(rows)
+                    dates.append(kline[0])
+                    opens.append(kline[1])
+                    closes.append(kline[2])
+                    highs.append(kline[3])
+                    lows.append(kline[4])
+                    vols.append(kline[5])
+
+            df = pd.DataFrame({
+                'date': dates,
+                'open': np.asarray(opens, dtype=np.float32),
+                'close': np.asarray(closes, dtype=np.float32),
+                'high': np.asarray(highs, dtype=np.float32),
+                'low': np.asarray(lows, dtype=np.float32),
+                'volume': np.asarray(vols, dtype=np.float64).astype(np.int64),
+            })
+            df['symbol'] = symbol
             if not df.empty:
                 df['date'] = pd.to_datetime(df['date'])
                 df = df.sort_values('date')
-                # 计算涨跌幅
-                df['pct_change'] = df['close'].pct_change() * 100
+                # 计算涨跌幅（直接在NumPy数组上diff）
+                closes_arr = df['close'].to_numpy(dtype=np.float64)
+                df['pct_change'] = np.concatenate(
+                    ([np.nan], np.diff(closes_arr) / closes_arr[:-1] * 100))
                 self.logger.info(f"获取到{symbol} {len(df)}条历史数据")
-            
+
             return df
             
         except Exception as e:
             self.logger.error(f"获取{symbol}历史数据失败: {e}")
             return pd.DataFrame()
     
+    @cached(ttl=30)
     def get_stock_info(self, symbol: str) -> Dict:
-        """获取股票基本信息"""
+        """获取股票基本信息（缓存30秒）"""
         try:
             real_time = self.get_real_time_price(symbol)
             
@@ -256,8 +298,10 @@ class QQStockDataSource(BaseDataSource):
                 'data_source': self.name
             }
     
-    def _convert_symbol(self, symbol: str) -> str:
-        """转换股票代码为腾讯格式"""
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def _convert_symbol(symbol: str) -> str:
+        """转换股票代码为腾讯格式（结果缓存，约5000只代码即饱和）"""
         if symbol.startswith('6'):
             return f"sh{symbol}"  # 上海
         else:
@@ -273,12 +317,50 @@ class QQStockDataSource(BaseDataSource):
         
         return self.get_daily_prices(symbol, start_date, end_date)
     
+    # 批量行情接口单次请求的代码数上限
+    _BATCH_SIZE = 60
+
+    def _get_quotes_batch(self, symbols: List[str]) -> List[Dict]:
+        """单次HTTP请求批量获取多只股票的行情
+
+        接口原生支持q=sh600000,sz000001,...的多代码查询，
+        一次往返替代逐只串行的N次往返。
+        :param symbols: 股票代码列表（不超过_BATCH_SIZE只）
+        :return: 解析后的行情字典列表
+        """
+        codes = ','.join(self._convert_symbol(s) for s in symbols)
+        url = f"{self.base_url}/q={codes}"
+
+        response = self.session.get(url, timeout=10)
+        if response.status_code != 200:
+            return []
+
+        quotes = []
+        for m in _QUOTE_RE.finditer(response.text):
+            quote = self._parse_quote(m.group(1)[-6:], m.group(2))
+            if quote:
+                quotes.append(quote)
+        return quotes
+
+    def _get_quotes_batch_safe(self, batch: List[str]) -> List[Dict]:
+        """批量获取的异常安全包装（单片失败不影响其他分片）"""
+        try:
+            return self._get_quotes_batch(batch)
+        except Exception as e:
+            self.logger.error(f"批量获取实时数据失败: {e}")
+            return []
+
     def get_realtime_data(self, symbols: List[str]) -> pd.DataFrame:
-        """获取实时数据"""
-        data_list = []
-        for symbol in symbols:
-            real_time = self.get_real_time_price(symbol)
-            if real_time:
-                data_list.append(real_time)
-        
+        """获取实时数据（多代码分批，各分片并发请求）"""
+        batches = [symbols[i:i + self._BATCH_SIZE]
+                   for i in range(0, len(symbols), self._BATCH_SIZE)]
+
+        if len(batches) <= 1:
+            data_list = self._get_quotes_batch_safe(symbols) if symbols else []
+        else:
+            # 各分片HTTP往返并发进行，总耗时约等于单次往返
+            data_list = []
+            for quotes in self._executor.map(self._get_quotes_batch_safe, batches):
+                data_list.extend(quotes)
+
         return pd.DataFrame(data_list)
\ No newline at end of file
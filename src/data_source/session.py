@@ -0,0 +1,47 @@
+"""
+数据源共享HTTP会话
+为各数据源提供带连接池和重试配置的requests.Session单例
+"""
+
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 指数退避重试：0.4s/0.8s/1.6s，限流(429)和5xx都重试；
+# 只重试幂等的GET，避免写操作重复执行
+_RETRY_KW = dict(
+    total=3,
+    backoff_factor=0.4,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(['GET'])
+)
+try:
+    # urllib3 2.x支持退避加随机抖动，错开并发请求的重试时刻
+    _RETRY = Retry(backoff_jitter=0.1, **_RETRY_KW)
+except TypeError:  # urllib3 1.x无backoff_jitter参数
+    _RETRY = Retry(**_RETRY_KW)
+
+
+@lru_cache(maxsize=None)
+def get_pooled_session(name: str) -> requests.Session:
+    """按数据源名称获取带连接池的Session单例
+
+    keep-alive连接池把TCP握手成本摊薄到整个会话的所有请求上，
+    首次请求之后同主机的调用复用现有连接；瞬时网络错误和5xx
+    由urllib3 Retry做小步退避自动重试。
+    :param name: 数据源名称（每个数据源一个独立会话，互不影响请求头）
+    """
+    session = requests.Session()
+    # 池上限对齐实时行情线程池的并发上限（32），避免高并发时
+    # 连接被丢弃后反复重建
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=_RETRY
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Accept-Encoding': 'gzip'})
+    return session
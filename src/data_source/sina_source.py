@@ -3,14 +3,26 @@
 实时股票行情数据获取
 """
 
+import functools
 import requests
 import pandas as pd
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import logging
 from typing import Dict, List, Optional
 import re
 from .base import BaseDataSource
+from .cache import cached
+from .session import get_pooled_session
+
+# 批量响应的行情行匹配（模块加载时编译一次）
+_QUOTE_RE = re.compile(r'var hq_str_(\w+)="([^"]*)"')
+
+
+def _field(parts, i):
+    """取第i个字段并转float（缺失或为空返回0）"""
+    return float(parts[i]) if len(parts) > i and parts[i] else 0
 
 
 class SinaDataSource(BaseDataSource):
@@ -20,12 +32,14 @@ class SinaDataSource(BaseDataSource):
         super().__init__("sina")
         self.description = "新浪财经 - 实时股票行情数据"
         self.base_url = "http://hq.sinajs.cn"
-        self.session = requests.Session()
+        self.session = get_pooled_session(self.name)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
             'Referer': 'http://finance.sina.com.cn/'
         })
         self.logger = logging.getLogger(__name__)
+        # 批量行情分片的并发执行器（Session对GET线程安全，连接池共享）
+        self._executor = ThreadPoolExecutor(max_workers=8)
         
     def connect(self) -> bool:
         """测试连接"""
@@ -81,8 +95,36 @@ class SinaDataSource(BaseDataSource):
             self.logger.error(f"获取股票列表失败: {e}")
             return pd.DataFrame()
     
+    def _parse_quote(self, symbol: str, data_str: str) -> Dict:
+        """解析单只股票的行情串（hq_str_xxx引号内的逗号分隔字段）
+
+        最大只用到第31个字段，split限定maxsplit避免为尾部
+        用不到的字段分配子串。
+        """
+        data_parts = data_str.split(',', 32)
+
+        if len(data_parts) < 32:
+            return {}
+
+        # 新浪数据格式解析
+        return {
+            'symbol': symbol,
+            'name': data_parts[0],
+            'open': _field(data_parts, 1),
+            'prev_close': _field(data_parts, 2),
+            'price': _field(data_parts, 3),
+            'high': _field(data_parts, 4),
+            'low': _field(data_parts, 5),
+            'bid_price': _field(data_parts, 6),
+            'ask_price': _field(data_parts, 7),
+            'volume': int(_field(data_parts, 8)),
+            'turnover': _field(data_parts, 9),
+            'timestamp': f"{data_parts[30]} {data_parts[31]}" if len(data_parts) > 31 else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    @cached(ttl=3)
     def get_real_time_price(self, symbol: str) -> Dict:
-        """获取实时价格"""
+        """获取实时价格（缓存3秒，轮询场景下避免重复请求）"""
         try:
             sina_symbol = self._convert_symbol(symbol)
             url = f"{self.base_url}/list={sina_symbol}"
@@ -100,27 +142,7 @@ class SinaDataSource(BaseDataSource):
             if not match:
                 return {}
             
-            data_str = match.group(1)
-            data_parts = data_str.split(',')
-            
-            if len(data_parts) < 32:
-                return {}
-            
-            # 新浪数据格式解析
-            return {
-                'symbol': symbol,
-                'name': data_parts[0],
-                'open': float(data_parts[1]) if data_parts[1] else 0,
-                'prev_close': float(data_parts[2]) if data_parts[2] else 0,
-                'price': float(data_parts[3]) if data_parts[3] else 0,
-                'high': float(data_parts[4]) if data_parts[4] else 0,
-                'low': float(data_parts[5]) if data_parts[5] else 0,
-                'bid_price': float(data_parts[6]) if data_parts[6] else 0,
-                'ask_price': float(data_parts[7]) if data_parts[7] else 0,
-                'volume': int(float(data_parts[8])) if data_parts[8] else 0,
-                'turnover': float(data_parts[9]) if data_parts[9] else 0,
-                'timestamp': f"{data_parts[30]} {data_parts[31]}" if len(data_parts) > 31 else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
+            return self._parse_quote(symbol, match.group(1))
             
         except Exception as e:
             self.logger.error(f"获取{symbol}实时数据失败: {e}")
@@ -131,8 +153,9 @@ class SinaDataSource(BaseDataSource):
         self.logger.warning("新浪财经数据源不支持历史数据获取")
         return pd.DataFrame()
     
+    @cached(ttl=30)
     def get_stock_info(self, symbol: str) -> Dict:
-        """获取股票基本信息"""
+        """获取股票基本信息（缓存30秒）"""
         try:
             real_time = self.get_real_time_price(symbol)
             
@@ -194,8 +217,10 @@ class SinaDataSource(BaseDataSource):
                 'data_source': self.name
             }
     
-    def _convert_symbol(self, symbol: str) -> str:
-        """转换股票代码为新浪格式"""
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def _convert_symbol(symbol: str) -> str:
+        """转换股票代码为新浪格式（结果缓存，约5000只代码即饱和）"""
         if symbol.startswith('6'):
             return f"sh{symbol}"  # 上海
         else:
@@ -206,12 +231,50 @@ class SinaDataSource(BaseDataSource):
         """获取价格数据（新浪不支持历史数据）"""
         return self.get_daily_prices(symbol, start_date or '', end_date or '')
     
+    # 批量行情接口单次请求的代码数上限
+    _BATCH_SIZE = 80
+
+    def _get_quotes_batch(self, symbols: List[str]) -> List[Dict]:
+        """单次HTTP请求批量获取多只股票的行情
+
+        接口原生支持list=sh600000,sz000001,...的多代码查询，
+        一次往返替代逐只串行的N次往返。
+        :param symbols: 股票代码列表（不超过_BATCH_SIZE只）
+        :return: 解析后的行情字典列表
+        """
+        codes = ','.join(self._convert_symbol(s) for s in symbols)
+        url = f"{self.base_url}/list={codes}"
+
+        response = self.session.get(url, timeout=10)
+        if response.status_code != 200:
+            return []
+
+        quotes = []
+        for m in _QUOTE_RE.finditer(response.text):
+            quote = self._parse_quote(m.group(1)[-6:], m.group(2))
+            if quote:
+                quotes.append(quote)
+        return quotes
+
+    def _get_quotes_batch_safe(self, batch: List[str]) -> List[Dict]:
+        """批量获取的异常安全包装（单片失败不影响其他分片）"""
+        try:
+            return self._get_quotes_batch(batch)
+        except Exception as e:
+            self.logger.error(f"批量获取实时数据失败: {e}")
+            return []
+
     def get_realtime_data(self, symbols: List[str]) -> pd.DataFrame:
-        """获取实时数据"""
-        data_list = []
-        for symbol in symbols:
-            real_time = self.get_real_time_price(symbol)
-            if real_time:
-                data_list.append(real_time)
-        
+        """获取实时数据（多代码分批，各分片并发请求）"""
+        batches = [symbols[i:i + self._BATCH_SIZE]
+                   for i in range(0, len(symbols), self._BATCH_SIZE)]
+
+        if len(batches) <= 1:
+            data_list = self._get_quotes_batch_safe(symbols) if symbols else []
+        else:
+            # 各分片HTTP往返并发进行，总耗时约等于单次往返
+            data_list = []
+            for quotes in self._executor.map(self._get_quotes_batch_safe, batches):
+                data_list.extend(quotes)
+
         return pd.DataFrame(data_list)
\ No newline at end of file
@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 import logging
 from typing import Dict, List, Optional
 from .base import BaseDataSource
+from .session import get_pooled_session
 
 
 class WangYiDataSource(BaseDataSource):
@@ -19,7 +20,7 @@ class WangYiDataSource(BaseDataSource):
         super().__init__("wangyi")
         self.description = "网易财经 - 股票行情数据"
         self.base_url = "http://api.money.126.net"
-        self.session = requests.Session()
+        self.session = get_pooled_session(self.name)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
             'Referer': 'http://money.163.com/'
@@ -209,6 +209,59 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def get_daily_prices_batch(self, symbols: List[str], start_date: str = None,
+                               end_date: str = None) -> Dict[str, pd.DataFrame]:
+        """批量获取多只股票的日线价格数据
+
+        一条IN查询取回所有股票的数据后在内存中按symbol分组，
+        替代逐只股票查询的N+1模式。
+        :param symbols: 股票代码列表
+        :return: symbol -> 日线DataFrame 的字典（无数据的股票不出现）
+        """
+        if not symbols:
+            return {}
+
+        session = self.get_session()
+        try:
+            query = session.query(DailyPrice).filter(DailyPrice.symbol.in_(symbols))
+
+            if start_date:
+                query = query.filter(DailyPrice.date >= start_date)
+            if end_date:
+                query = query.filter(DailyPrice.date <= end_date)
+
+            query = query.order_by(DailyPrice.symbol, DailyPrice.date)
+            prices = query.all()
+
+            data = []
+            for price in prices:
+                data.append({
+                    'symbol': price.symbol,
+                    'date': price.date,
+                    'open': price.open,
+                    'close': price.close,
+                    'high': price.high,
+                    'low': price.low,
+                    'volume': price.volume,
+                    'amount': price.amount,
+                    'pct_change': price.pct_change,
+                    'change': price.change,
+                    'turnover_rate': price.turnover_rate
+                })
+
+            if not data:
+                return {}
+
+            df = pd.DataFrame(data)
+            return {symbol: group.reset_index(drop=True)
+                    for symbol, group in df.groupby('symbol', sort=False)}
+
+        except Exception as e:
+            self.logger.error(f"批量获取日线数据失败: {e}")
+            return {}
+        finally:
+            session.close()
+
     def save_realtime_price(self, price_data: Dict) -> bool:
         """保存实时价格数据"""
         session = self.get_session()